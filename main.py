@@ -1,25 +1,1370 @@
 import sys
 import os
 import json
+import collections
+import queue
+import shutil
+import signal
+import subprocess
+import sqlite3
+import threading
+import time
+import zipfile
 from datetime import datetime
 from PyQt6.QtWebChannel import QWebChannel
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QListWidget, QWidget,
     QVBoxLayout, QHBoxLayout, QLabel, QToolBar, QMenu,
     QMessageBox, QLineEdit, QPushButton, QComboBox, QCheckBox, QPushButton, QGroupBox, QSpacerItem, QSizePolicy,
-    QDialog, QVBoxLayout as QVBoxDialogLayout, QFormLayout, QTextEdit, QInputDialog, QListWidgetItem
+    QDialog, QVBoxLayout as QVBoxDialogLayout, QFormLayout, QTextEdit, QInputDialog, QListWidgetItem,
+    QProgressDialog, QFileDialog
 )
 from PyQt6.QtWebEngineWidgets import QWebEngineView
-from PyQt6.QtWebEngineCore import QWebEngineProfile, QWebEnginePage, QWebEngineSettings
-from PyQt6.QtCore import QUrl, QStandardPaths, QSize, QPoint, Qt, QObject, pyqtSlot
-from PyQt6.QtGui import QAction, QFont, QColor, QIcon
+from PyQt6.QtWebEngineCore import (
+    QWebEngineProfile, QWebEnginePage, QWebEngineSettings, QWebEngineScript, QWebEngineUrlRequestInterceptor,
+    QWebEngineUrlRequestInfo
+)
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+from PyQt6.QtCore import (
+    QUrl, QStandardPaths, QSize, QPoint, Qt, QObject, pyqtSlot, pyqtSignal, QThread, QTimer, QEvent,
+    QFile, QIODevice, QPointF
+)
+from PyQt6.QtGui import QAction, QFont, QColor, QIcon, QImage, QKeyEvent, QMouseEvent, QWheelEvent
+
+try:
+    import plyvel
+except ImportError:
+    plyvel = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
 
 STORAGE_FILE = os.path.join(QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation), "storages.json")
 SETTINGS_FILE = "settings.json"
+SESSION_FILE = os.path.join(QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation), "session.json")
+ARCHIVE_CHUNK_SIZE = 1024 * 1024
+
+STORAGE_CATEGORIES = {
+    "HTTP Cache": ["Cache", "Code Cache"],
+    "IndexedDB": ["IndexedDB"],
+    "Local Storage": ["Local Storage", "Session Storage"],
+    "Service Worker": ["Service Worker"],
+    "GPU Cache": ["GPUCache", "GrShaderCache", "ShaderCache", "DawnCache"],
+}
+QUOTA_SAMPLE_INTERVAL_MS = 500
+QUOTA_FULL_RESCAN_SAMPLES = 60
+PERF_MEASURE_MS = 3000
+FRAME_CAP_SCRIPT_NAME = "w96-frame-cap"
+FRAME_CAP_JS = """
+(function() {
+    window.__w96FrameCap = %FPS%;
+    if (window.__w96FrameCapPatched) {
+        return;
+    }
+    window.__w96FrameCapPatched = true;
+
+    const nativeRaf = window.requestAnimationFrame.bind(window);
+    const nativeSetTimeout = window.setTimeout.bind(window);
+    const nativeSetInterval = window.setInterval.bind(window);
+    const queue = new Map();
+    let nextId = 0;
+    let scheduled = false;
+    let lastFrame = 0;
+
+    function flush(ts) {
+        const cap = window.__w96FrameCap;
+        if (cap && ts - lastFrame < 1000 / cap - 1) {
+            nativeSetTimeout(() => nativeRaf(flush), 1000 / cap - (ts - lastFrame));
+            return;
+        }
+        scheduled = false;
+        lastFrame = ts;
+        const callbacks = Array.from(queue.values());
+        queue.clear();
+        for (const cb of callbacks) {
+            try { cb(ts); } catch (e) { nativeSetTimeout(() => { throw e; }); }
+        }
+    }
+
+    window.requestAnimationFrame = function(cb) {
+        queue.set(++nextId, cb);
+        if (!scheduled) {
+            scheduled = true;
+            nativeRaf(flush);
+        }
+        return nextId;
+    };
+    window.cancelAnimationFrame = function(id) {
+        queue.delete(id);
+    };
+    window.setInterval = function(fn, delay, ...args) {
+        const cap = window.__w96FrameCap;
+        return nativeSetInterval(fn, cap ? Math.max(delay || 0, 1000 / cap) : delay, ...args);
+    };
+})();
+"""
+FPS_COUNTER_JS = """
+(function() {
+    window.__w96FpsCount = 0;
+    const until = performance.now() + %MS%;
+    function tick(ts) {
+        window.__w96FpsCount++;
+        if (ts < until) {
+            requestAnimationFrame(tick);
+        }
+    }
+    requestAnimationFrame(tick);
+})();
+"""
+CAPTURE_BUFFERS = 4
+GOLDEN_DIFF_SIZE = 64
+GOLDEN_DIFF_THRESHOLD = 0.02
+NETWORK_LOG_SIZE = 5000
+DEFAULT_BLOCK_DOMAINS = [
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+    "googlesyndication.com", "adservice.google.com", "hotjar.com",
+]
+RESOURCE_TIMING_SCRIPT_NAME = "w96-resource-timing"
+RESOURCE_TIMING_JS = """
+performance.setResourceTimingBufferSize(%SIZE%);
+"""
+RESOURCE_ENTRIES_JS = """
+JSON.stringify(performance.getEntriesByType("resource").map(e => [
+    e.name, e.startTime, e.duration, e.transferSize, e.encodedBodySize, e.decodedBodySize
+]))
+"""
+CONTROL_SERVER_NAME = "windows96box"
+CONTROL_JS_TIMEOUT_MS = 30000
+INPUT_FORMAT_VERSION = 1
+REPLAY_STEP_TIMEOUT_MS = 5000
+STEP_IDLE_JS = """
+requestAnimationFrame(() => setTimeout(() => {
+    const done = () => window.__w96Channel && window.__w96Channel.objects.pyHeartbeat.stepDone(%STEP%);
+    if (window.requestIdleCallback) {
+        requestIdleCallback(done, {timeout: %TIMEOUT%});
+    } else {
+        setTimeout(done, 0);
+    }
+}));
+"""
+RESTORE_CONCURRENCY = 2
+RESTORE_SETTLE_MS = 3000
+PLACEHOLDER_HTML = """
+<html>
+<head><style>
+    body {
+        background-color: black;
+        color: lime;
+        font-family: "Lucida Console", monospace;
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        height: 100vh;
+        margin: 0;
+        font-size: 16px;
+    }
+</style></head>
+<body>
+    <p>%TITLE% is suspended. Click this window to boot it.</p>
+</body>
+</html>
+"""
+HEARTBEAT_INTERVAL_MS = 250
+HANG_TIMEOUT_S = 10
+HISTOGRAM_SUB_BITS = 4
+HEARTBEAT_SCRIPT_NAME = "w96-heartbeat"
+HEARTBEAT_JS = """
+(function() {
+    const nativeSetTimeout = window.setTimeout.bind(window);
+    const interval = %INTERVAL%;
+    function start() {
+        if (typeof qt === "undefined" || !qt.webChannelTransport) {
+            nativeSetTimeout(start, 100);
+            return;
+        }
+        new QWebChannel(qt.webChannelTransport, function(channel) {
+            window.__w96Channel = channel;
+            const heartbeat = channel.objects.pyHeartbeat;
+            let expected = performance.now() + interval;
+            function beat() {
+                const now = performance.now();
+                heartbeat.beat(Math.max(0, now - expected));
+                expected = now + interval;
+                nativeSetTimeout(beat, interval);
+            }
+            nativeSetTimeout(beat, interval);
+            if (typeof PerformanceObserver !== "undefined") {
+                try {
+                    new PerformanceObserver(list => {
+                        for (const entry of list.getEntries()) {
+                            heartbeat.longTask(entry.duration);
+                        }
+                    }).observe({entryTypes: ["longtask"]});
+                } catch (e) {}
+            }
+        });
+    }
+    start();
+})();
+"""
+PURGEABLE_DIRS = ["Cache", "Code Cache", "GPUCache", "GrShaderCache", "ShaderCache", "DawnCache"]
+IDB_COMPARATOR = b"idb_cmp1"
 
 from PyQt6.QtWebChannel import QWebChannel
 from PyQt6.QtCore import QObject, pyqtSlot
 
+
+def load_settings():
+    settings = {
+        "enable_cors": False,
+        "allow_drag_programs": False,
+        "archive_after_days": 30,
+        "block_domains": DEFAULT_BLOCK_DOMAINS,
+        "control_server": False,
+        "control_server_name": CONTROL_SERVER_NAME,
+        "hang_policy": "restart",
+        "hang_timeout_s": HANG_TIMEOUT_S,
+        "max_auto_restarts": 3,
+        "restore_session": True,
+        "restore_mode": "focus",
+        "restore_concurrency": RESTORE_CONCURRENCY,
+    }
+    if os.path.exists(SETTINGS_FILE):
+        with open(SETTINGS_FILE, "r") as f:
+            settings.update(json.load(f))
+    return settings
+
+def save_settings(settings):
+    with open(SETTINGS_FILE, "w") as f:
+        json.dump(settings, f)
+
+def get_profile_path(name):
+    base_path = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
+    return os.path.join(base_path, f"Profile_{name}")
+
+def get_archive_path(name):
+    return get_profile_path(name) + ".zip"
+
+def is_storage_archived(name):
+    return os.path.exists(get_archive_path(name)) and not os.path.exists(get_profile_path(name))
+
+def get_process_cpu_time(pid):
+    if not pid:
+        return None
+    if psutil is not None:
+        try:
+            times = psutil.Process(pid).cpu_times()
+            return times.user + times.system
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+def get_gpu_process_cpu_time():
+    if psutil is None:
+        return None
+    for proc in psutil.Process().children(recursive=True):
+        try:
+            if "--type=gpu-process" in proc.cmdline():
+                times = proc.cpu_times()
+                return times.user + times.system
+        except psutil.Error:
+            pass
+    return None
+
+def get_launcher_cpu_time():
+    times = os.times()
+    return times.user + times.system
+
+def get_capture_dir(name):
+    base_path = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
+    path = os.path.join(base_path, "Captures", f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def perceptual_diff(image_a, image_b):
+    thumbs = []
+    for image in (image_a, image_b):
+        thumb = image.convertToFormat(QImage.Format.Format_Grayscale8).scaled(
+            GOLDEN_DIFF_SIZE, GOLDEN_DIFF_SIZE,
+            Qt.AspectRatioMode.IgnoreAspectRatio, Qt.TransformationMode.SmoothTransformation
+        )
+        thumbs.append(thumb.constBits().asstring(thumb.sizeInBytes()))
+    return sum(abs(a - b) for a, b in zip(*thumbs)) / (255 * len(thumbs[0]))
+
+def get_network_dir():
+    base_path = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
+    path = os.path.join(base_path, "Network")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def get_diagnostics_dir():
+    base_path = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
+    path = os.path.join(base_path, "Diagnostics")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def get_qwebchannel_js():
+    qwebchannel_file = QFile(":/qtwebchannel/qwebchannel.js")
+    if not qwebchannel_file.open(QIODevice.OpenModeFlag.ReadOnly):
+        return None
+    source = bytes(qwebchannel_file.readAll()).decode("utf-8")
+    qwebchannel_file.close()
+    return source
+
+def get_benchmark_dir(kind):
+    base_path = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
+    path = os.path.join(base_path, kind)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def get_storage_size(name):
+    if is_storage_archived(name):
+        return os.path.getsize(get_archive_path(name))
+
+    size_bytes = 0
+    for root, _, files in os.walk(get_profile_path(name)):
+        for f in files:
+            fp = os.path.join(root, f)
+            size_bytes += os.path.getsize(fp)
+    return size_bytes
+
+
+class LaunchError(Exception):
+    pass
+
+
+class ArchiveWorker(QThread):
+    archived = pyqtSignal(str, int, int)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, names):
+        super().__init__()
+        self.names = list(names)
+        self.lock = threading.Lock()
+        self.skipped = set()
+
+    def skip(self, name):
+        with self.lock:
+            self.skipped.add(name)
+
+    def run(self):
+        for name in self.names:
+            if name in self.skipped:
+                continue
+            try:
+                self.archive(name)
+            except Exception as e:
+                self.failed.emit(name, str(e))
+
+    def archive(self, name):
+        storage_path = get_profile_path(name)
+        archive_path = get_archive_path(name)
+        part_path = archive_path + ".part"
+        if not os.path.isdir(storage_path):
+            return
+
+        original_size = 0
+        with zipfile.ZipFile(part_path, "w", zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+            for root, _, files in os.walk(storage_path):
+                for f in files:
+                    if name in self.skipped:
+                        break
+                    fp = os.path.join(root, f)
+                    zf.write(fp, os.path.relpath(fp, storage_path))
+                    original_size += os.path.getsize(fp)
+
+        trash_path = storage_path + ".archived"
+        with self.lock:
+            try:
+                if name in self.skipped:
+                    return
+                if os.path.exists(trash_path):
+                    shutil.rmtree(trash_path)
+                os.replace(storage_path, trash_path)
+                try:
+                    os.replace(part_path, archive_path)
+                except Exception:
+                    os.replace(trash_path, storage_path)
+                    raise
+            finally:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+        shutil.rmtree(trash_path, ignore_errors=True)
+
+        self.archived.emit(name, original_size, os.path.getsize(archive_path))
+
+
+class RestoreWorker(QThread):
+    progress = pyqtSignal(int, int)
+    failed = pyqtSignal(str)
+
+    def __init__(self, name):
+        super().__init__()
+        self.name = name
+
+    def run(self):
+        storage_path = get_profile_path(self.name)
+        archive_path = get_archive_path(self.name)
+        part_path = storage_path + ".part"
+        try:
+            if os.path.exists(part_path):
+                shutil.rmtree(part_path)
+
+            with zipfile.ZipFile(archive_path, "r") as zf:
+                members = zf.infolist()
+                total = sum(info.file_size for info in members)
+                done = 0
+                for info in members:
+                    target = os.path.join(part_path, info.filename)
+                    if info.is_dir():
+                        os.makedirs(target, exist_ok=True)
+                        continue
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    with zf.open(info) as src, open(target, "wb") as dst:
+                        while True:
+                            chunk = src.read(ARCHIVE_CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            dst.write(chunk)
+                            done += len(chunk)
+                            self.progress.emit(done, total)
+
+            os.replace(part_path, storage_path)
+            os.remove(archive_path)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+class StorageMaintenance:
+    def __init__(self, name, profile=None):
+        self.name = name
+        self.profile = profile
+        self.storage_path = get_profile_path(name)
+
+    def breakdown(self):
+        sizes = {category: 0 for category in STORAGE_CATEGORIES}
+        sizes["Other"] = 0
+        top_level = {d: category for category, dirs in STORAGE_CATEGORIES.items() for d in dirs}
+
+        for root, _, files in os.walk(self.storage_path):
+            rel = os.path.relpath(root, self.storage_path)
+            category = top_level.get(rel.split(os.sep)[0], "Other")
+            for f in files:
+                try:
+                    sizes[category] += os.path.getsize(os.path.join(root, f))
+                except OSError:
+                    pass
+        return sizes
+
+    def purge_caches(self):
+        if self.profile is not None:
+            self.profile.clearHttpCache()
+            return
+
+        for rel in PURGEABLE_DIRS:
+            path = os.path.join(self.storage_path, rel)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def compact(self):
+        skipped = []
+        for root, _, files in os.walk(self.storage_path):
+            if "CURRENT" in files and any(f.startswith("MANIFEST-") for f in files):
+                if self.uses_idb_comparator(root, files):
+                    skipped.append(f"{os.path.relpath(root, self.storage_path)} (IndexedDB, not supported)")
+                    continue
+                if plyvel is None:
+                    skipped.append(f"{os.path.relpath(root, self.storage_path)} (plyvel not installed)")
+                    continue
+                try:
+                    db = plyvel.DB(root)
+                    db.compact_range()
+                    db.close()
+                except Exception as e:
+                    skipped.append(f"{os.path.relpath(root, self.storage_path)} ({e})")
+                continue
+
+            for f in files:
+                fp = os.path.join(root, f)
+                try:
+                    with open(fp, "rb") as fh:
+                        if fh.read(16) != b"SQLite format 3\x00":
+                            continue
+                    conn = sqlite3.connect(fp)
+                    conn.execute("VACUUM")
+                    conn.close()
+                except Exception as e:
+                    skipped.append(f"{os.path.relpath(fp, self.storage_path)} ({e})")
+        return skipped
+
+    def uses_idb_comparator(self, root, files):
+        for f in files:
+            if f.startswith("MANIFEST-"):
+                try:
+                    with open(os.path.join(root, f), "rb") as fh:
+                        if IDB_COMPARATOR in fh.read():
+                            return True
+                except OSError:
+                    pass
+        return False
+
+
+class MaintenanceDialog(QDialog):
+    def __init__(self, name, profile=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Storage Maintenance - {name}")
+        self.setMinimumSize(360, 260)
+        self.maintenance = StorageMaintenance(name, profile)
+        self.running = profile is not None
+
+        layout = QVBoxLayout()
+        self.form_layout = QFormLayout()
+        self.size_labels = {}
+        for category in list(STORAGE_CATEGORIES) + ["Other", "Total"]:
+            label = QLabel()
+            self.size_labels[category] = label
+            self.form_layout.addRow(f"{category}:", label)
+        layout.addLayout(self.form_layout)
+
+        purge_button = QPushButton("Purge Caches")
+        purge_button.clicked.connect(self.purge_caches)
+        layout.addWidget(purge_button)
+
+        self.compact_button = QPushButton("Compact Databases")
+        self.compact_button.setEnabled(not self.running)
+        self.compact_button.setToolTip("Close all windows using this storage first." if self.running else "")
+        self.compact_button.clicked.connect(self.compact)
+        layout.addWidget(self.compact_button)
+
+        idb_label = QLabel("IndexedDB databases are not compacted: they use Chromium's idb_cmp1 key order.")
+        idb_label.setWordWrap(True)
+        layout.addWidget(idb_label)
+
+        self.setLayout(layout)
+        self.refresh()
+
+    def refresh(self):
+        sizes = self.maintenance.breakdown()
+        sizes["Total"] = sum(sizes.values())
+        for category, size in sizes.items():
+            self.size_labels[category].setText(f"{round(size / (1024 * 1024), 2)} MB")
+        return sizes
+
+    def report(self, title, before, after, notes=None):
+        lines = []
+        for category in before:
+            if before[category] != after[category]:
+                lines.append(f"{category}: {round(before[category] / (1024 * 1024), 2)} MB -> "
+                             f"{round(after[category] / (1024 * 1024), 2)} MB")
+        freed = round((before["Total"] - after["Total"]) / (1024 * 1024), 2)
+        lines.append(f"\nReclaimed: {freed} MB")
+        if notes:
+            lines.append("\nSkipped:\n" + "\n".join(notes))
+        QMessageBox.information(self, title, "\n".join(lines))
+
+    def purge_caches(self):
+        before = self.refresh()
+        self.maintenance.purge_caches()
+        if self.running:
+            QTimer.singleShot(1000, lambda: self.report("Purge Caches", before, self.refresh()))
+        else:
+            self.report("Purge Caches", before, self.refresh())
+
+    def compact(self):
+        before = self.refresh()
+        skipped = self.maintenance.compact()
+        self.report("Compact Databases", before, self.refresh(), skipped)
+
+
+class StorageUsageTracker:
+    def __init__(self, name):
+        self.storage_path = get_profile_path(name)
+        self.dirs = {}
+        self.samples = 0
+
+    def sample(self):
+        self.samples += 1
+        if self.samples % QUOTA_FULL_RESCAN_SAMPLES == 0:
+            self.dirs.clear()
+        return self.scan_dir(self.storage_path)
+
+    def scan_dir(self, path):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            self.dirs.pop(path, None)
+            return 0
+
+        cached = self.dirs.get(path)
+        if cached is None or cached[0] != mtime:
+            files, subdirs = [], []
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        else:
+                            files.append(entry.path)
+            except OSError:
+                pass
+            cached = (mtime, files, subdirs)
+            self.dirs[path] = cached
+
+        total = 0
+        for fp in cached[1]:
+            try:
+                total += os.stat(fp).st_size
+            except OSError:
+                pass
+        for sub in cached[2]:
+            total += self.scan_dir(sub)
+        return total
+
+
+class UsageSampler(QThread):
+    sampled = pyqtSignal(object, str, object)
+
+    def __init__(self):
+        super().__init__()
+        self.requests = queue.Queue()
+        self.trackers = {}
+
+    def request(self, key, name):
+        self.requests.put((key, name))
+
+    def stop(self):
+        self.requests.put(None)
+        self.wait()
+
+    def run(self):
+        while True:
+            item = self.requests.get()
+            if item is None:
+                return
+            key, name = item
+            tracker = self.trackers.get(name)
+            if tracker is None:
+                tracker = self.trackers[name] = StorageUsageTracker(name)
+            self.sampled.emit(key, name, tracker.sample())
+
+
+class QuotaMonitor(QObject):
+    sampled = pyqtSignal(str, float)
+    soft_limit_reached = pyqtSignal(object, float)
+    hard_limit_reached = pyqtSignal(object, float)
+    limit_cleared = pyqtSignal(object, float)
+
+    def __init__(self, storages, parent=None):
+        super().__init__(parent)
+        self.storages = storages
+        self.windows = []
+        self.guest_usage = {}
+        self.states = {}
+        self.next_index = 0
+        self.pending = False
+
+        self.sampler = UsageSampler()
+        self.sampler.sampled.connect(self.on_sampled)
+        self.sampler.start()
+        QApplication.instance().aboutToQuit.connect(self.stop)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.sample_next)
+        self.timer.start(QUOTA_SAMPLE_INTERVAL_MS)
+
+    def stop(self):
+        self.timer.stop()
+        self.sampler.stop()
+
+    def watch(self, window):
+        if window not in self.windows:
+            self.windows.append(window)
+
+    def unwatch(self, window):
+        if window in self.windows:
+            self.windows.remove(window)
+        self.guest_usage.pop(id(window), None)
+        self.states.pop(id(window), None)
+
+    def sample_next(self):
+        for window in [w for w in self.windows if not w.isVisible()]:
+            self.unwatch(window)
+        if not self.windows or self.pending:
+            return
+
+        self.next_index %= len(self.windows)
+        window = self.windows[self.next_index]
+        self.next_index += 1
+
+        def store_guest_usage(usage, key=id(window)):
+            if isinstance(usage, (int, float)) and key in self.states:
+                self.guest_usage[key] = usage
+
+        self.states.setdefault(id(window), "ok")
+        window.browser.page().runJavaScript(
+            "navigator.storage.estimate().then(e => { window.__w96StorageUsage = e.usage; });"
+            "window.__w96StorageUsage || 0",
+            store_guest_usage
+        )
+
+        self.pending = True
+        self.sampler.request(id(window), window.profile_name)
+
+    def on_sampled(self, key, name, tracked_bytes):
+        self.pending = False
+        window = next((w for w in self.windows if id(w) == key), None)
+        if window is None:
+            return
+
+        size_bytes = max(tracked_bytes, self.guest_usage.get(key, 0))
+        size_mb = round(size_bytes / (1024 * 1024), 2)
+        self.sampled.emit(name, size_mb)
+
+        data = self.storages.get(name, {})
+        if not data.get("limit_enabled", False):
+            return
+        max_size = data.get("max_size_mb", 0)
+        soft_size = max_size * data.get("soft_limit_percent", 90) / 100
+
+        if size_mb > max_size:
+            state = "hard"
+        elif size_mb > soft_size:
+            state = "soft"
+        else:
+            state = "ok"
+
+        previous = self.states.get(id(window))
+        if state == previous:
+            return
+        self.states[id(window)] = state
+        if state == "hard":
+            self.hard_limit_reached.emit(window, size_mb)
+        elif state == "soft":
+            self.soft_limit_reached.emit(window, size_mb)
+        elif state == "ok":
+            self.limit_cleared.emit(window, size_mb)
+
+
+class FrameEncoder(QThread):
+    failed = pyqtSignal(str)
+
+    def __init__(self, frames, free_buffers, output_dir, fps, video):
+        super().__init__()
+        self.frames = frames
+        self.free_buffers = free_buffers
+        self.output_dir = output_dir
+        self.fps = fps
+        self.video = video
+        self.process = None
+        self.video_size = None
+        self.last_image = None
+        self.dropped = 0
+        self.error = None
+
+    def run(self):
+        try:
+            while True:
+                item = self.frames.get()
+                if item is None:
+                    break
+                index, image = item
+                if self.video:
+                    self.write_video_frame(image)
+                    continue
+                if image is None:
+                    continue
+                try:
+                    if not image.save(os.path.join(self.output_dir, f"frame_{index:06d}.png"), "PNG"):
+                        raise OSError(f"Failed to write frame {index}")
+                finally:
+                    self.free_buffers.put(image)
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            if self.process is not None:
+                try:
+                    self.process.stdin.close()
+                except OSError:
+                    pass
+                stderr = self.process.stderr.read().decode(errors="replace").strip()
+                if self.process.wait() != 0:
+                    self.error = f"ffmpeg exited with code {self.process.returncode}" + (f": {stderr}" if stderr else "")
+
+        if self.error:
+            self.failed.emit(self.error)
+
+    def write_video_frame(self, image):
+        if image is not None and self.process is None:
+            self.video_size = (image.width(), image.height())
+            self.process = subprocess.Popen(
+                [shutil.which("ffmpeg"), "-y", "-loglevel", "error",
+                 "-f", "rawvideo", "-pix_fmt", "bgra", "-s", f"{self.video_size[0]}x{self.video_size[1]}",
+                 "-r", str(self.fps), "-i", "-",
+                 "-vf", "scale=trunc(iw/2)*2:trunc(ih/2)*2",
+                 "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+                 os.path.join(self.output_dir, "recording.mp4")],
+                stdin=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+        if image is not None and (image.width(), image.height()) != self.video_size:
+            self.dropped += 1
+            self.free_buffers.put(image)
+            image = None
+
+        if image is None:
+            image = self.last_image
+        elif self.last_image is not None:
+            self.free_buffers.put(self.last_image)
+        if image is None:
+            return
+        self.last_image = image
+
+        bits = image.constBits()
+        bits.setsize(image.sizeInBytes())
+        self.process.stdin.write(memoryview(bits))
+
+
+class FrameCapture(QObject):
+    failed = pyqtSignal(str)
+
+    def __init__(self, view, output_dir, fps=30, video=False):
+        super().__init__(view)
+        self.view = view
+        self.output_dir = output_dir
+        self.frames = queue.Queue()
+        self.free_buffers = queue.Queue()
+        self.index = 0
+        self.dropped = 0
+
+        for _ in range(CAPTURE_BUFFERS):
+            self.free_buffers.put(self.allocate_buffer())
+
+        self.encoder = FrameEncoder(self.frames, self.free_buffers, output_dir, fps, video)
+        self.encoder.failed.connect(self.failed)
+
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.timer.timeout.connect(self.capture_frame)
+
+    def allocate_buffer(self):
+        ratio = self.view.devicePixelRatioF()
+        image = QImage(int(self.view.width() * ratio), int(self.view.height() * ratio), QImage.Format.Format_RGB32)
+        image.setDevicePixelRatio(ratio)
+        return image
+
+    def start(self):
+        self.encoder.start()
+        self.timer.start(int(1000 / self.encoder.fps))
+
+    def stop(self):
+        self.timer.stop()
+        self.frames.put(None)
+        self.encoder.wait()
+
+    def capture_frame(self):
+        try:
+            image = self.free_buffers.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            self.frames.put((self.index, None))
+            self.index += 1
+            return
+
+        ratio = self.view.devicePixelRatioF()
+        if image.width() != int(self.view.width() * ratio) or image.height() != int(self.view.height() * ratio):
+            image = self.allocate_buffer()
+
+        self.view.render(image)
+        self.frames.put((self.index, image))
+        self.index += 1
+
+
+class RequestInterceptor(QWebEngineUrlRequestInterceptor):
+    def __init__(self, block_domains, parent=None):
+        super().__init__(parent)
+        self.block_domains = {d.strip().lower() for d in block_domains if d.strip()}
+        self.records = collections.deque(maxlen=NETWORK_LOG_SIZE)
+        self.sequence = 0
+        self.boot_sequence = 0
+        self.boot_started = time.time()
+
+    def is_blocked(self, host):
+        parts = host.lower().split(".")
+        return any(".".join(parts[i:]) in self.block_domains for i in range(len(parts) - 1))
+
+    def interceptRequest(self, info):
+        resource_type = info.resourceType()
+        if resource_type == QWebEngineUrlRequestInfo.ResourceType.ResourceTypeMainFrame:
+            self.boot_sequence = self.sequence
+            self.boot_started = time.time()
+
+        url = info.requestUrl()
+        blocked = bool(self.block_domains) and self.is_blocked(url.host())
+        if blocked:
+            info.block(True)
+
+        self.records.append((
+            self.sequence, time.time(), url.toString(), resource_type.name.replace("ResourceType", ""),
+            bytes(info.requestMethod()).decode(), blocked
+        ))
+        self.sequence += 1
+
+    def boot_records(self):
+        return [r for r in self.records if r[0] >= self.boot_sequence]
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.buckets = collections.Counter()
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def bucket_index(self, value):
+        sub_count = 1 << HISTOGRAM_SUB_BITS
+        if value < 2 * sub_count:
+            return value
+        shift = value.bit_length() - (HISTOGRAM_SUB_BITS + 1)
+        return sub_count + shift * sub_count + ((value >> shift) - sub_count)
+
+    def bucket_value(self, index):
+        sub_count = 1 << HISTOGRAM_SUB_BITS
+        if index < 2 * sub_count:
+            return index
+        shift = (index - sub_count) // sub_count
+        return (sub_count + (index - sub_count) % sub_count) << shift
+
+    def record(self, ms):
+        value = max(0, int(ms * 1000))
+        self.buckets[self.bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, p):
+        if not self.count:
+            return 0
+        target = self.count * p / 100
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= target:
+                return min(self.bucket_value(index + 1) - 1, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "min_ms": (self.min or 0) / 1000,
+            "max_ms": self.max / 1000,
+            "mean_ms": round(self.total / self.count / 1000, 3) if self.count else 0,
+            "p50_ms": self.percentile(50) / 1000,
+            "p90_ms": self.percentile(90) / 1000,
+            "p99_ms": self.percentile(99) / 1000,
+            "p999_ms": self.percentile(99.9) / 1000,
+        }
+
+    def to_dict(self):
+        return dict(
+            self.summary(),
+            unit="us",
+            buckets={str(self.bucket_value(i)): n for i, n in sorted(self.buckets.items())},
+        )
+
+
+class HeartbeatBridge(QObject):
+    def __init__(self, monitor):
+        super().__init__()
+        self.monitor = monitor
+
+    @pyqtSlot(float)
+    def beat(self, lag_ms):
+        self.monitor.record_beat(lag_ms)
+
+    @pyqtSlot(float)
+    def longTask(self, duration_ms):
+        self.monitor.record_long_task(duration_ms)
+
+    @pyqtSlot(int)
+    def stepDone(self, step):
+        self.monitor.step_done.emit(step)
+
+
+class GuestMonitor(QObject):
+    hang_detected = pyqtSignal(float)
+    step_done = pyqtSignal(int)
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.window = window
+        self.page = window.browser.page()
+        self.latency = LatencyHistogram()
+        self.long_tasks = LatencyHistogram()
+        self.console = collections.deque(maxlen=50)
+        self.last_beat = None
+        self.hung = False
+        self.killing = False
+        self.in_dialog = False
+        self.restarts = 0
+
+        settings = load_settings()
+        self.policy = settings.get("hang_policy", "restart")
+        self.hang_timeout = settings.get("hang_timeout_s", HANG_TIMEOUT_S)
+        self.max_restarts = settings.get("max_auto_restarts", 3)
+
+        self.bridge = HeartbeatBridge(self)
+        self.channel = QWebChannel(self)
+        self.console_bridge = ConsoleBridge(None)
+        self.channel.registerObject("pyHeartbeat", self.bridge)
+        self.channel.registerObject("pyConsole", self.console_bridge)
+        self.page.setWebChannel(self.channel)
+
+        qwebchannel_js = get_qwebchannel_js()
+        if qwebchannel_js:
+            script = QWebEngineScript()
+            script.setName(HEARTBEAT_SCRIPT_NAME)
+            script.setSourceCode(qwebchannel_js + HEARTBEAT_JS.replace("%INTERVAL%", str(HEARTBEAT_INTERVAL_MS)))
+            script.setInjectionPoint(QWebEngineScript.InjectionPoint.DocumentCreation)
+            script.setWorldId(QWebEngineScript.ScriptWorldId.MainWorld)
+            self.page.scripts().insert(script)
+
+        self.page.loadStarted.connect(self.reset_beat)
+        self.page.renderProcessTerminated.connect(self.on_render_process_terminated)
+        if hasattr(self.page, "consoleMessage"):
+            self.page.consoleMessage.connect(
+                lambda level, message, line, source: self.console.append(f"[{level}] {source}:{line} {message}")
+            )
+        if hasattr(self.page, "dialogActive"):
+            self.page.dialogActive.connect(self.set_in_dialog)
+
+        self.watchdog = QTimer(self)
+        self.watchdog.timeout.connect(self.check_hang)
+        self.watchdog.start(1000)
+
+    def stop(self):
+        self.watchdog.stop()
+        self.last_beat = None
+
+    def reset_beat(self):
+        self.last_beat = time.monotonic()
+        self.hung = False
+
+    def set_in_dialog(self, active):
+        self.in_dialog = active
+        if self.last_beat is not None:
+            self.last_beat = time.monotonic()
+
+    def is_paused(self):
+        return (self.in_dialog or QApplication.activeModalWidget() is not None
+                or not self.window.isVisible() or self.window.isMinimized()
+                or self.page.lifecycleState() != QWebEnginePage.LifecycleState.Active)
+
+    def record_beat(self, lag_ms):
+        self.last_beat = time.monotonic()
+        if self.hung:
+            self.hung = False
+            self.window.statusBar().clearMessage()
+        if not self.is_paused():
+            self.latency.record(lag_ms)
+
+    def record_long_task(self, duration_ms):
+        self.long_tasks.record(duration_ms)
+
+    def check_hang(self):
+        if self.last_beat is None:
+            return
+        if self.is_paused():
+            self.last_beat = time.monotonic()
+            return
+
+        stalled = time.monotonic() - self.last_beat
+        if stalled < self.hang_timeout or self.hung:
+            return
+
+        self.hung = True
+        self.hang_detected.emit(stalled)
+        self.save_diagnostics("hang", {"stalled_s": round(stalled, 1)})
+        self.window.statusBar().showMessage(f"Guest has not responded for {stalled:.0f} seconds.")
+        self.recover("The guest has stopped responding.", hung=True)
+
+    def on_render_process_terminated(self, status, exit_code):
+        self.last_beat = None
+        self.save_diagnostics("render_process_terminated", {"status": status.name, "exit_code": exit_code})
+        if self.killing:
+            self.killing = False
+            QTimer.singleShot(1000, self.window.browser.reload)
+        elif status != QWebEnginePage.RenderProcessTerminationStatus.NormalTerminationStatus:
+            self.recover(f"The guest renderer terminated ({status.name}, exit code {exit_code}).")
+
+    def recover(self, reason, hung=False):
+        if self.policy == "restart" and self.restarts < self.max_restarts:
+            self.restarts += 1
+            self.window.statusBar().showMessage(f"{reason} Restarting ({self.restarts}/{self.max_restarts})...", 5000)
+        elif self.policy in ("restart", "prompt"):
+            confirm = QMessageBox.question(
+                self.window, "Guest Not Responding", f"{reason}\nRestart it?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if confirm != QMessageBox.StandardButton.Yes:
+                return
+        else:
+            return
+
+        if hung and self.kill_render_process():
+            return
+        QTimer.singleShot(1000, self.window.browser.reload)
+
+    def kill_render_process(self):
+        pid = self.page.renderProcessPid()
+        if not pid:
+            return False
+        self.killing = True
+        try:
+            if psutil is not None:
+                psutil.Process(pid).kill()
+            else:
+                os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+        except Exception:
+            self.killing = False
+            return False
+        return True
+
+    def host_load(self):
+        load = {"cpu_count": os.cpu_count()}
+        if hasattr(os, "getloadavg"):
+            load["loadavg"] = os.getloadavg()
+        if psutil is not None:
+            load["cpu_percent"] = psutil.cpu_percent()
+        load["open_windows"] = sum(
+            1 for w in QApplication.topLevelWidgets() if isinstance(w, BrowserWindow) and w.isVisible()
+        )
+        return load
+
+    def report(self):
+        return {
+            "storage": self.window.profile_name,
+            "url": self.window.home_url,
+            "timestamp": datetime.now().isoformat(),
+            "heartbeat_interval_ms": HEARTBEAT_INTERVAL_MS,
+            "host": self.host_load(),
+            "restarts": self.restarts,
+            "latency": self.latency.to_dict(),
+            "long_tasks": self.long_tasks.to_dict(),
+        }
+
+    def save_diagnostics(self, kind, details):
+        path = os.path.join(
+            get_diagnostics_dir(), f"{self.window.profile_name}_{kind}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        )
+        with open(path, "w") as f:
+            json.dump(dict(self.report(), event=kind, details=details, console=list(self.console)), f, indent=2)
+        return path
+
+
+class InputRecorder(QObject):
+    def __init__(self, window, path):
+        super().__init__(window)
+        self.window = window
+        self.path = path
+        self.file = None
+        self.target = None
+        self.started = 0
+        self.count = 0
+
+    def start(self):
+        self.target = self.window.browser.focusProxy() or self.window.browser
+        self.file = open(self.path, "w")
+        view = self.target
+        self.file.write(json.dumps({
+            "format": "w96-input",
+            "version": INPUT_FORMAT_VERSION,
+            "url": self.window.home_url,
+            "size": [view.width(), view.height()],
+            "recorded": datetime.now().isoformat(),
+        }) + "\n")
+        self.started = time.perf_counter_ns()
+        self.target.installEventFilter(self)
+
+    def stop(self):
+        if self.target is not None:
+            self.target.removeEventFilter(self)
+            self.target = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def eventFilter(self, obj, event):
+        record = self.encode(event)
+        if record is not None:
+            self.file.write(json.dumps([(time.perf_counter_ns() - self.started) // 1000] + record, separators=(",", ":")) + "\n")
+            self.count += 1
+        return False
+
+    def encode(self, event):
+        event_type = event.type()
+        if event_type in (QEvent.Type.KeyPress, QEvent.Type.KeyRelease):
+            return ["kp" if event_type == QEvent.Type.KeyPress else "kr",
+                    event.key(), event.modifiers().value, event.text(), event.isAutoRepeat()]
+        if event_type in (QEvent.Type.MouseButtonPress, QEvent.Type.MouseButtonRelease,
+                          QEvent.Type.MouseButtonDblClick, QEvent.Type.MouseMove):
+            kind = {
+                QEvent.Type.MouseButtonPress: "mp",
+                QEvent.Type.MouseButtonRelease: "mr",
+                QEvent.Type.MouseButtonDblClick: "md",
+                QEvent.Type.MouseMove: "mm",
+            }[event_type]
+            pos = event.position()
+            return [kind, round(pos.x(), 1), round(pos.y(), 1),
+                    event.button().value, event.buttons().value, event.modifiers().value]
+        if event_type == QEvent.Type.Wheel:
+            pos = event.position()
+            delta = event.angleDelta()
+            return ["wh", round(pos.x(), 1), round(pos.y(), 1), delta.x(), delta.y(),
+                    event.buttons().value, event.modifiers().value]
+        return None
+
+
+class InputReplayer(QObject):
+    finished = pyqtSignal(dict)
+
+    STEP_KINDS = ("kp", "mp", "mr", "md", "wh")
+    MOUSE_TYPES = {
+        "mp": QEvent.Type.MouseButtonPress,
+        "mr": QEvent.Type.MouseButtonRelease,
+        "md": QEvent.Type.MouseButtonDblClick,
+        "mm": QEvent.Type.MouseMove,
+    }
+
+    def __init__(self, window, path, realtime=True):
+        super().__init__(window)
+        self.window = window
+        self.path = path
+        self.realtime = realtime
+        with open(path, "r") as f:
+            self.header = json.loads(f.readline())
+            self.events = [json.loads(line) for line in f if line.strip()]
+        if self.header.get("format") != "w96-input":
+            raise ValueError("Not an input recording")
+
+        self.index = 0
+        self.step = 0
+        self.step_started = {}
+        self.steps = []
+        self.latency = LatencyHistogram()
+        self.waiting = None
+        self.started = 0
+        self.target = None
+        self.scale = (1.0, 1.0)
+
+        self.timeout = QTimer(self)
+        self.timeout.setSingleShot(True)
+        self.timeout.timeout.connect(self.expire_pending)
+        self.done = False
+        self.window.guest_monitor.step_done.connect(self.on_step_done)
+
+    def start(self):
+        self.target = self.window.browser.focusProxy() or self.window.browser
+        width, height = self.header.get("size", [self.target.width(), self.target.height()])
+        self.scale = (self.target.width() / width if width else 1.0, self.target.height() / height if height else 1.0)
+        self.started = time.perf_counter_ns()
+        self.dispatch_next()
+
+    def stop(self):
+        self.timeout.stop()
+        self.index = len(self.events)
+        self.waiting = None
+        self.step_started.clear()
+        self.finish()
+
+    def expire_pending(self):
+        for step in sorted(self.step_started):
+            self.on_step_done(step, timed_out=True)
+
+    def dispatch_next(self):
+        while self.index < len(self.events):
+            record = self.events[self.index]
+            if self.realtime:
+                due_ms = (record[0] - (time.perf_counter_ns() - self.started) // 1000) / 1000
+                if due_ms > 1:
+                    QTimer.singleShot(int(due_ms), self.dispatch_next)
+                    return
+
+            self.index += 1
+            self.inject(record)
+            if record[1] in self.STEP_KINDS:
+                self.step += 1
+                self.step_started[self.step] = (time.perf_counter(), record[1])
+                self.window.browser.page().runJavaScript(
+                    STEP_IDLE_JS.replace("%STEP%", str(self.step)).replace("%TIMEOUT%", str(REPLAY_STEP_TIMEOUT_MS))
+                )
+                if not self.realtime:
+                    self.waiting = self.step
+                    self.timeout.start(REPLAY_STEP_TIMEOUT_MS)
+                    return
+
+        if self.step_started:
+            self.timeout.start(REPLAY_STEP_TIMEOUT_MS)
+        else:
+            self.finish()
+
+    def inject(self, record):
+        kind = record[1]
+        modifiers = Qt.KeyboardModifier(record[-1])
+        if kind in ("kp", "kr"):
+            event_type = QEvent.Type.KeyPress if kind == "kp" else QEvent.Type.KeyRelease
+            event = QKeyEvent(event_type, record[2], Qt.KeyboardModifier(record[3]), record[4], record[5])
+        elif kind == "wh":
+            pos = QPointF(record[2] * self.scale[0], record[3] * self.scale[1])
+            event = QWheelEvent(pos, QPointF(self.target.mapToGlobal(pos)), QPoint(0, 0), QPoint(record[4], record[5]),
+                                Qt.MouseButton(record[6]), modifiers, Qt.ScrollPhase.NoScrollPhase, False)
+        else:
+            pos = QPointF(record[2] * self.scale[0], record[3] * self.scale[1])
+            event = QMouseEvent(self.MOUSE_TYPES[kind], pos, QPointF(self.target.mapToGlobal(pos)),
+                                Qt.MouseButton(record[4]), Qt.MouseButton(record[5]), modifiers)
+        QApplication.sendEvent(self.target, event)
+
+    def on_step_done(self, step, timed_out=False):
+        started = self.step_started.pop(step, None)
+        if started is None:
+            return
+        latency_ms = (time.perf_counter() - started[0]) * 1000
+        self.steps.append({"step": step, "kind": started[1], "latency_ms": round(latency_ms, 3), "timed_out": timed_out})
+        if not timed_out:
+            self.latency.record(latency_ms)
+
+        if step == self.waiting:
+            self.timeout.stop()
+            self.waiting = None
+            self.dispatch_next()
+        elif self.index >= len(self.events) and not self.step_started:
+            self.finish()
+
+    def finish(self):
+        if self.done:
+            return
+        self.done = True
+        self.timeout.stop()
+        self.window.guest_monitor.step_done.disconnect(self.on_step_done)
+        self.finished.emit({
+            "recording": self.path,
+            "url": self.window.home_url,
+            "mode": "realtime" if self.realtime else "fast",
+            "timestamp": datetime.now().isoformat(),
+            "events": len(self.events),
+            "duration_ms": round((time.perf_counter_ns() - self.started) / 1e6, 3),
+            "latency": self.latency.summary(),
+            "steps": sorted(self.steps, key=lambda s: s["step"]),
+        })
+
+
 class CloseBridge(QObject):
     def __init__(self, window):
         super().__init__()
@@ -37,11 +1382,13 @@ class ConsoleBridge(QObject):
 
     @pyqtSlot(str)
     def log(self, message):
+        if self.console_widget is None:
+            return
         self.console_widget.append(f"[log] {message}")
         self.console_widget.verticalScrollBar().setValue(self.console_widget.verticalScrollBar().maximum())
 
 class DevConsole(QDialog):
-    def __init__(self, web_page: QWebEnginePage):
+    def __init__(self, web_page: QWebEnginePage, console_bridge):
         super().__init__()
         self.setWindowTitle("Developer Console")
         self.setMinimumSize(600, 300)
@@ -62,58 +1409,43 @@ class DevConsole(QDialog):
         layout.addWidget(self.input)
         self.setLayout(layout)
 
-        self.console_bridge = ConsoleBridge(self.output)
-        self.channel = QWebChannel()
-        self.channel.registerObject("pyConsole", self.console_bridge)
-        self.web_page.setWebChannel(self.channel)
+        self.console_bridge = console_bridge
+        self.console_bridge.console_widget = self.output
 
-        self.web_page.loadFinished.connect(self.inject_webchannel_js)
+        self.web_page.loadFinished.connect(self.inject_console_hook)
+        self.inject_console_hook()
 
-    def inject_webchannel_js(self):
+    def inject_console_hook(self):
         try:
-            possible_paths = [
-                os.path.join(sys.prefix, "Lib", "site-packages", "PyQt6", "Qt6", "resources", "qtwebchannel", "qwebchannel.js"),
-                os.path.join(sys.prefix, "Lib", "site-packages", "PyQt6", "Qt", "resources", "qtwebchannel", "qwebchannel.js"),
-            ]
-            qweb_js = None
-            for path in possible_paths:
-                if os.path.exists(path):
-                    with open(path, "r", encoding="utf-8") as f:
-                        qweb_js = f.read()
-                    break
-
-            if not qweb_js:
-                raise FileNotFoundError("qwebchannel.js not found in known paths.")
-
-            self.web_page.runJavaScript(qweb_js)
-
             self.web_page.runJavaScript("""
                 (function() {
                     function initHook() {
-                        if (typeof qt === 'undefined' || !qt.webChannelTransport) {
+                        if (!window.__w96Channel) {
                             setTimeout(initHook, 100);
                             return;
                         }
-                        new QWebChannel(qt.webChannelTransport, function(channel) {
-                            const pyConsole = channel.objects.pyConsole;
-                            const originalLog = console.log;
-                            console.log = function(...args) {
-                                try {
-                                    const message = args.map(a =>
-                                        typeof a === 'object' ? JSON.stringify(a) : String(a)
-                                    ).join(" ");
-                                    pyConsole.log(message);
-                                } catch (e) {}
-                                originalLog.apply(console, args);
-                            };
-                            console.log("✅ DevConsole hook active");
-                        });
+                        if (window.__w96ConsoleHooked) {
+                            return;
+                        }
+                        window.__w96ConsoleHooked = true;
+                        const pyConsole = window.__w96Channel.objects.pyConsole;
+                        const originalLog = console.log;
+                        console.log = function(...args) {
+                            try {
+                                const message = args.map(a =>
+                                    typeof a === 'object' ? JSON.stringify(a) : String(a)
+                                ).join(" ");
+                                pyConsole.log(message);
+                            } catch (e) {}
+                            originalLog.apply(console, args);
+                        };
+                        console.log("✅ DevConsole hook active");
                     }
                     initHook();
                 })();
             """)
         except Exception as e:
-            self.output.append(f'<span style="color: red;">❌ Failed to inject qwebchannel.js: {e}</span>')
+            self.output.append(f'<span style="color: red;">❌ Failed to hook the console: {e}</span>')
 
     def run_command(self):
         cmd = self.input.text().strip()
@@ -163,26 +1495,69 @@ class SettingsDialog(QDialog):
             "allow_drag_programs": self.drag_checkbox.isChecked()
         }
 
+class LoadScheduler(QObject):
+    def __init__(self, limit=RESTORE_CONCURRENCY, parent=None):
+        super().__init__(parent)
+        self.limit = max(1, limit)
+        self.pending = []
+        self.loading = []
+        self.slots = {}
+
+    def request(self, window, priority=False):
+        if window.booted or window in self.loading:
+            return
+        if window in self.pending:
+            self.pending.remove(window)
+        if priority:
+            self.pending.insert(0, window)
+        else:
+            self.pending.append(window)
+        self.pump()
+
+    def pump(self):
+        self.pending = [w for w in self.pending if w.isVisible() and not w.booted]
+        while self.pending and len(self.loading) < self.limit:
+            window = self.pending.pop(0)
+            self.loading.append(window)
+            self.slots[window] = lambda ok, w=window: self.on_loaded(w, ok)
+            window.page_loaded.connect(self.slots[window])
+            QTimer.singleShot(30 * 1000, lambda w=window: self.release(w))
+            window.boot()
+
+    def on_loaded(self, window, ok):
+        if not ok or window.browser.url().host() != QUrl(window.home_url).host():
+            return
+        self.disconnect_window(window)
+        QTimer.singleShot(RESTORE_SETTLE_MS, lambda: self.release(window))
+
+    def disconnect_window(self, window):
+        slot = self.slots.pop(window, None)
+        if slot is not None:
+            window.page_loaded.disconnect(slot)
+
+    def release(self, window):
+        self.disconnect_window(window)
+        if window in self.loading:
+            self.loading.remove(window)
+            self.pump()
+
+
 class BrowserWindow(QMainWindow):
-    def __init__(self, title: str, url: str, profile: QWebEngineProfile):
+    boot_requested = pyqtSignal(object)
+    profile_requested = pyqtSignal(object)
+    activated = pyqtSignal(object)
+    closed = pyqtSignal(object)
+    page_loaded = pyqtSignal(bool)
+    console_message = pyqtSignal(str, str, int, str)
+
+    def __init__(self, title: str, url: str, profile: QWebEngineProfile, lazy: bool = False, storage_name: str = None):
         super().__init__()
         self.setWindowTitle(title)
         self.setGeometry(200, 150, 1000, 700)
         self.home_url = url
+        self.window_id = None
 
         self.browser = QWebEngineView()
-        page = QWebEnginePage(profile, self)
-
-        settings = page.settings()
-        settings.setAttribute(QWebEngineSettings.WebAttribute.LocalStorageEnabled, True)
-        settings.setAttribute(QWebEngineSettings.WebAttribute.PluginsEnabled, True)
-        settings.setAttribute(QWebEngineSettings.WebAttribute.JavascriptEnabled, True)
-        settings.setAttribute(QWebEngineSettings.WebAttribute.JavascriptCanAccessClipboard, True)
-        settings.setAttribute(QWebEngineSettings.WebAttribute.XSSAuditingEnabled, True)
-        settings.setAttribute(QWebEngineSettings.WebAttribute.Accelerated2dCanvasEnabled, True)
-
-        self.browser.setPage(page)
-        self.browser.setUrl(QUrl(url))
         self.setCentralWidget(self.browser)
 
         self.toolbar = QToolBar("Browser Toolbar")
@@ -214,20 +1589,99 @@ class BrowserWindow(QMainWindow):
         system_button.triggered.connect(self.open_system_menu)
         self.toolbar.addAction(system_button)
 
-        self.profile_name = profile.persistentStoragePath().split("_")[-1]
-        self.browser.page().loadFinished.connect(self.check_storage_limit)
+        performance_button = QAction("Performance", self)
+        performance_button.triggered.connect(self.open_performance_menu)
+        self.toolbar.addAction(performance_button)
+
+        capture_button = QAction("Capture", self)
+        capture_button.triggered.connect(self.open_capture_menu)
+        self.toolbar.addAction(capture_button)
+
+        self.frame_capture = None
+
+        network_button = QAction("Network", self)
+        network_button.triggered.connect(self.open_network_menu)
+        self.toolbar.addAction(network_button)
+
+        input_button = QAction("Input", self)
+        input_button.triggered.connect(self.open_input_menu)
+        self.toolbar.addAction(input_button)
+
+        self.input_recorder = None
+        self.input_replayer = None
+
+        self.resolution = None
+        self.render_scale = 1.0
+        self.frame_cap = 0
+        self.last_measurement = None
+
+        if profile is not None:
+            storage_name = os.path.basename(profile.persistentStoragePath())[len("Profile_"):]
+        self.profile_name = storage_name
+        self.interceptor = None
+        self.guest_monitor = None
+        self.disk_error_shown = False
+
+        self.booted = False
+        if lazy:
+            self.setAttribute(Qt.WidgetAttribute.WA_ShowWithoutActivating, True)
+            self.toolbar.setEnabled(False)
+            self.browser.setHtml(PLACEHOLDER_HTML.replace("%TITLE%", title))
+        else:
+            self.attach_profile(profile)
+            self.boot()
+
+    def attach_profile(self, profile):
+        page = ConsolePage(profile, self)
+
+        settings = page.settings()
+        settings.setAttribute(QWebEngineSettings.WebAttribute.LocalStorageEnabled, True)
+        settings.setAttribute(QWebEngineSettings.WebAttribute.PluginsEnabled, True)
+        settings.setAttribute(QWebEngineSettings.WebAttribute.JavascriptEnabled, True)
+        settings.setAttribute(QWebEngineSettings.WebAttribute.JavascriptCanAccessClipboard, True)
+        settings.setAttribute(QWebEngineSettings.WebAttribute.XSSAuditingEnabled, True)
+        settings.setAttribute(QWebEngineSettings.WebAttribute.Accelerated2dCanvasEnabled, True)
+
+        timing_script = QWebEngineScript()
+        timing_script.setName(RESOURCE_TIMING_SCRIPT_NAME)
+        timing_script.setSourceCode(RESOURCE_TIMING_JS.replace("%SIZE%", str(NETWORK_LOG_SIZE)))
+        timing_script.setInjectionPoint(QWebEngineScript.InjectionPoint.DocumentCreation)
+        timing_script.setWorldId(QWebEngineScript.ScriptWorldId.ApplicationWorld)
+        page.scripts().insert(timing_script)
+        self.interceptor = getattr(profile, "interceptor", None)
+
+        self.browser.setPage(page)
+        self.browser.setZoomFactor(self.render_scale)
+        page.loadFinished.connect(self.page_loaded)
+        page.consoleMessage.connect(self.console_message)
+        page.loadFinished.connect(self.check_storage_limit)
+        self.guest_monitor = GuestMonitor(self)
+        if self.frame_cap:
+            self.set_frame_cap(self.frame_cap)
+        self.toolbar.setEnabled(True)
+
+    def boot(self):
+        if self.booted:
+            return
+        self.booted = True
+        if self.guest_monitor is None:
+            self.profile_requested.emit(self)
+        else:
+            self.go_home()
+
+    def session_state(self):
+        geometry = self.normalGeometry() if self.isFullScreen() else self.geometry()
+        return {
+            "storage": self.profile_name,
+            "geometry": [geometry.x(), geometry.y(), geometry.width(), geometry.height()],
+            "resolution": list(self.resolution) if self.resolution else None,
+            "render_scale": self.render_scale,
+            "fullscreen": self.isFullScreen(),
+        }
 
     def check_storage_limit(self):
         name = self.profile_name
-        base_path = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
-        storage_path = os.path.join(base_path, f"Profile_{name}")
-
-        size_bytes = 0
-        for root, _, files in os.walk(storage_path):
-            for f in files:
-                fp = os.path.join(root, f)
-                size_bytes += os.path.getsize(fp)
-        size_mb = round(size_bytes / (1024 * 1024), 2)
+        size_mb = round(get_storage_size(name) / (1024 * 1024), 2)
 
         if os.path.exists(STORAGE_FILE):
             with open(STORAGE_FILE, "r") as f:
@@ -240,64 +1694,82 @@ class BrowserWindow(QMainWindow):
         max_size = data.get("max_size_mb", 0)
 
         if limit_enabled and size_mb > max_size:
-            self.browser.page().loadFinished.disconnect(self.check_storage_limit)
+            self.show_disk_error()
 
-            html = """
-            <html>
-            <head><style>
-                body {
-                    background-color: black;
-                    color: lime;
-                    font-family: "Lucida Console", monospace;
-                    padding: 40px;
-                    font-size: 16px;
-                }
-                .border {
-                    border: 2px solid lime;
-                    padding: 20px;
-                    max-width: 600px;
-                    margin: auto;
-                }
-                h1 {
-                    color: red;
-                    font-size: 20px;
-                }
-            </style></head>
-            <body>
-                <div class="border">
-                    <h1>*** DISK ERROR ***</h1>
-                    <p>LOCAL STORAGE HAS EXCEEDED ITS MAXIMUM ALLOWED SIZE.</p>
-                    <p>Please free up space or increase the size limit.</p>
-                </div>
-                <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
-                <script>
-                    document.body.addEventListener("keydown", () => {
-                        if (typeof pyBridge !== "undefined") {
-                            pyBridge.closeWindow();
-                        }
-                    });
-                    new QWebChannel(qt.webChannelTransport, function(channel) {
-                        window.pyBridge = channel.objects.pyBridge;
-                    });
-                </script>
-            </body>
-            </html>
-            """
+    def show_disk_error(self):
+        if self.disk_error_shown:
+            return
+        self.disk_error_shown = True
+        self.browser.page().loadFinished.disconnect(self.check_storage_limit)
+        self.guest_monitor.stop()
+
+        html = """
+        <html>
+        <head><style>
+            body {
+                background-color: black;
+                color: lime;
+                font-family: "Lucida Console", monospace;
+                padding: 40px;
+                font-size: 16px;
+            }
+            .border {
+                border: 2px solid lime;
+                padding: 20px;
+                max-width: 600px;
+                margin: auto;
+            }
+            h1 {
+                color: red;
+                font-size: 20px;
+            }
+        </style></head>
+        <body>
+            <div class="border">
+                <h1>*** DISK ERROR ***</h1>
+                <p>LOCAL STORAGE HAS EXCEEDED ITS MAXIMUM ALLOWED SIZE.</p>
+                <p>Please free up space or increase the size limit.</p>
+            </div>
+            <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
+            <script>
+                document.body.addEventListener("keydown", () => {
+                    if (typeof pyBridge !== "undefined") {
+                        pyBridge.closeWindow();
+                    }
+                });
+                new QWebChannel(qt.webChannelTransport, function(channel) {
+                    window.pyBridge = channel.objects.pyBridge;
+                });
+            </script>
+        </body>
+        </html>
+        """
 
-            bridge = CloseBridge(self)
-            channel = QWebChannel()
-            channel.registerObject("pyBridge", bridge)
-            self.browser.page().setWebChannel(channel)
+        bridge = CloseBridge(self)
+        channel = QWebChannel()
+        channel.registerObject("pyBridge", bridge)
+        self.browser.page().setWebChannel(channel)
+
+        actions_to_remove = ["System", "CORS Unblock", "Restart", "Open Apps", "Developer Console"]
+
+        for action in self.toolbar.actions():
+            if action.text() in actions_to_remove:
+                self.toolbar.removeAction(action)
+        
+        self.browser.setHtml(html)
 
-            actions_to_remove = ["System", "CORS Unblock", "Restart", "Open Apps", "Developer Console"]
 
-            for action in self.toolbar.actions():
-                if action.text() in actions_to_remove:
-                    self.toolbar.removeAction(action)
-            
-            self.browser.setHtml(html)
 
+    def freeze_for_quota(self, size_mb):
+        self.browser.hide()
+        self.browser.page().setLifecycleState(QWebEnginePage.LifecycleState.Frozen)
+        self.statusBar().showMessage(f"Frozen: storage uses {size_mb} MB and exceeds its size limit.")
 
+    def unfreeze(self):
+        if self.browser.page().lifecycleState() != QWebEnginePage.LifecycleState.Active:
+            self.browser.page().setLifecycleState(QWebEnginePage.LifecycleState.Active)
+            self.browser.show()
+        self.statusBar().clearMessage()
 
     def open_system_menu(self):
         menu = QMenu(self)
@@ -397,16 +1869,6 @@ class BrowserWindow(QMainWindow):
         dialog.exec()
 
 
-    def load_settings():
-        if os.path.exists(SETTINGS_FILE):
-            with open(SETTINGS_FILE, "r") as f:
-                return json.load(f)
-        return {"enable_cors": False, "allow_drag_programs": False}
-
-    def save_settings(settings):
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(settings, f)
-
     def toggle_cors_unblock(self, checked):
         self.corsunblock_enabled = checked
 
@@ -471,7 +1933,7 @@ class BrowserWindow(QMainWindow):
 
         for label, (w, h) in sizes.items():
             action = QAction(label, self)
-            action.triggered.connect(lambda checked=False, width=w, height=h: self.setFixedSize(width, height))
+            action.triggered.connect(lambda checked=False, width=w, height=h: self.set_resolution(width, height))
             menu.addAction(action)
 
         fullscreen_action = QAction("Toggle Fullscreen", self)
@@ -481,6 +1943,416 @@ class BrowserWindow(QMainWindow):
         pos = self.toolbar.mapToGlobal(QPoint(80, self.toolbar.height()))
         menu.popup(pos)
 
+    def set_resolution(self, width, height):
+        self.resolution = (width, height)
+        self.setFixedSize(int(width * self.render_scale), int(height * self.render_scale))
+
+    def open_performance_menu(self):
+        menu = QMenu(self)
+
+        scale_menu = menu.addMenu("Render Scale")
+        scale_menu.setEnabled(not (self.isFullScreen() or self.isMaximized()))
+        for percent in (100, 75, 50, 25):
+            action = QAction(f"{percent}%", self)
+            action.setCheckable(True)
+            action.setChecked(round(self.render_scale * 100) == percent)
+            action.triggered.connect(lambda checked=False, scale=percent / 100: self.set_render_scale(scale))
+            scale_menu.addAction(action)
+
+        fps_menu = menu.addMenu("Frame Rate Cap")
+        for fps in (0, 60, 30, 15, 5, 1):
+            action = QAction(f"{fps} fps" if fps else "Unlimited", self)
+            action.setCheckable(True)
+            action.setChecked(self.frame_cap == fps)
+            action.triggered.connect(lambda checked=False, cap=fps: self.set_frame_cap(cap))
+            fps_menu.addAction(action)
+
+        settings = self.browser.page().settings()
+        toggles = {
+            "Accelerated 2D Canvas": QWebEngineSettings.WebAttribute.Accelerated2dCanvasEnabled,
+            "WebGL": QWebEngineSettings.WebAttribute.WebGLEnabled,
+            "Smooth Scrolling": QWebEngineSettings.WebAttribute.ScrollAnimatorEnabled,
+        }
+        menu.addSeparator()
+        for label, attribute in toggles.items():
+            action = QAction(label, self)
+            action.setCheckable(True)
+            action.setChecked(settings.testAttribute(attribute))
+            action.triggered.connect(lambda checked, attr=attribute: self.set_render_attribute(attr, checked))
+            menu.addAction(action)
+
+        menu.addSeparator()
+        tile_action = QAction("Monitoring Tile Preset", self)
+        tile_action.triggered.connect(lambda: (self.set_render_scale(0.5), self.set_frame_cap(5)))
+        menu.addAction(tile_action)
+
+        full_action = QAction("Full Quality Preset", self)
+        full_action.triggered.connect(lambda: (self.set_render_scale(1.0), self.set_frame_cap(0)))
+        menu.addAction(full_action)
+
+        measure_action = QAction("Measure Usage", self)
+        measure_action.triggered.connect(self.measure_performance)
+        menu.addAction(measure_action)
+
+        responsiveness_action = QAction("Guest Responsiveness", self)
+        responsiveness_action.triggered.connect(self.show_responsiveness)
+        menu.addAction(responsiveness_action)
+
+        export_histogram_action = QAction("Export Latency Histogram", self)
+        export_histogram_action.triggered.connect(self.export_latency_histogram)
+        menu.addAction(export_histogram_action)
+
+        pos = self.toolbar.mapToGlobal(QPoint(160, self.toolbar.height()))
+        menu.popup(pos)
+
+    def show_responsiveness(self):
+        latency = self.guest_monitor.latency.summary()
+        long_tasks = self.guest_monitor.long_tasks.summary()
+        QMessageBox.information(
+            self, "Guest Responsiveness",
+            f"Event loop latency over {latency['count']} heartbeats:\n"
+            f"p50 {latency['p50_ms']} ms, p90 {latency['p90_ms']} ms, "
+            f"p99 {latency['p99_ms']} ms, max {latency['max_ms']} ms\n\n"
+            f"Long tasks: {long_tasks['count']} (p99 {long_tasks['p99_ms']} ms, max {long_tasks['max_ms']} ms)\n"
+            f"Auto restarts: {self.guest_monitor.restarts}"
+        )
+
+    def export_latency_histogram(self):
+        path = self.guest_monitor.save_diagnostics("latency", {})
+        self.statusBar().showMessage(f"Latency histogram saved to {path}", 10000)
+
+    def set_render_scale(self, scale):
+        if self.isFullScreen() or self.isMaximized():
+            self.statusBar().showMessage("Render scale is unavailable while fullscreen or maximized.", 5000)
+            return
+        previous = self.render_scale
+        self.render_scale = scale
+        self.browser.setZoomFactor(scale)
+        if self.resolution:
+            self.set_resolution(*self.resolution)
+        elif not self.isFullScreen():
+            self.resize(int(self.width() * scale / previous), int(self.height() * scale / previous))
+
+    def set_frame_cap(self, fps):
+        self.frame_cap = fps
+        source = FRAME_CAP_JS.replace("%FPS%", str(fps))
+        scripts = self.browser.page().scripts()
+        for script in scripts.find(FRAME_CAP_SCRIPT_NAME):
+            scripts.remove(script)
+
+        if fps:
+            script = QWebEngineScript()
+            script.setName(FRAME_CAP_SCRIPT_NAME)
+            script.setSourceCode(source)
+            script.setInjectionPoint(QWebEngineScript.InjectionPoint.DocumentCreation)
+            script.setWorldId(QWebEngineScript.ScriptWorldId.MainWorld)
+            scripts.insert(script)
+            self.browser.page().runJavaScript(source)
+        else:
+            self.browser.page().runJavaScript("window.__w96FrameCap = 0;")
+
+    def set_render_attribute(self, attribute, enabled):
+        self.browser.page().settings().setAttribute(attribute, enabled)
+        self.statusBar().showMessage("Render setting changed. Restart the VM to apply it.", 5000)
+
+    def measure_performance(self):
+        pid = self.browser.page().renderProcessPid()
+        start = (time.monotonic(), get_process_cpu_time(pid), get_gpu_process_cpu_time(), get_launcher_cpu_time())
+        self.browser.page().runJavaScript(FPS_COUNTER_JS.replace("%MS%", str(PERF_MEASURE_MS)))
+        self.statusBar().showMessage("Measuring performance...", PERF_MEASURE_MS)
+
+        def finish():
+            elapsed = time.monotonic() - start[0]
+            renderer_cpu = get_process_cpu_time(pid)
+            gpu_cpu = get_gpu_process_cpu_time()
+            launcher_cpu = get_launcher_cpu_time()
+
+            def report(frames):
+                measurement = {
+                    "renderer": (renderer_cpu - start[1]) / elapsed * 100 if renderer_cpu is not None and start[1] is not None else None,
+                    "gpu": (gpu_cpu - start[2]) / elapsed * 100 if gpu_cpu is not None and start[2] is not None else None,
+                    "launcher": (launcher_cpu - start[3]) / elapsed * 100,
+                    "fps": (frames or 0) / elapsed,
+                }
+                lines = [f"Render scale: {round(self.render_scale * 100)}%, frame cap: {self.frame_cap or 'unlimited'}"]
+                for key, label in (("renderer", "Renderer CPU"), ("gpu", "GPU process CPU"), ("launcher", "Launcher CPU"), ("fps", "Guest FPS")):
+                    if measurement[key] is None:
+                        lines.append(f"{label}: unavailable" + (" (needs psutil and a separate GPU process)" if key == "gpu" else ""))
+                        continue
+                    line = f"{label}: {measurement[key]:.1f}" + ("" if key == "fps" else "%")
+                    if self.last_measurement and self.last_measurement.get(key) is not None:
+                        line += f" (previously {self.last_measurement[key]:.1f})"
+                    lines.append(line)
+                self.last_measurement = measurement
+                QMessageBox.information(self, "Performance", "\n".join(lines))
+
+            self.browser.page().runJavaScript("window.__w96FpsCount", report)
+
+        QTimer.singleShot(PERF_MEASURE_MS, finish)
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.Type.WindowStateChange and (self.isFullScreen() or self.isMaximized()) and self.render_scale != 1.0:
+            self.render_scale = 1.0
+            self.browser.setZoomFactor(1.0)
+            self.statusBar().showMessage("Render scale reset to 100% for fullscreen or maximized.", 5000)
+        if event.type() == QEvent.Type.ActivationChange and self.isActiveWindow():
+            self.activated.emit(self)
+            if not self.booted:
+                self.boot_requested.emit(self)
+        super().changeEvent(event)
+
+    def open_capture_menu(self):
+        menu = QMenu(self)
+
+        screenshot_action = QAction("Save Screenshot", self)
+        screenshot_action.triggered.connect(self.save_screenshot)
+        menu.addAction(screenshot_action)
+
+        if self.frame_capture is None:
+            png_action = QAction("Record PNG Sequence", self)
+            png_action.triggered.connect(lambda: self.start_capture(video=False))
+            menu.addAction(png_action)
+
+            video_action = QAction("Record Video", self)
+            video_action.setEnabled(shutil.which("ffmpeg") is not None)
+            video_action.triggered.connect(lambda: self.start_capture(video=True))
+            menu.addAction(video_action)
+        else:
+            stop_action = QAction("Stop Recording", self)
+            stop_action.triggered.connect(self.stop_capture)
+            menu.addAction(stop_action)
+
+        golden_action = QAction("Compare with Golden Image...", self)
+        golden_action.triggered.connect(self.compare_with_golden_dialog)
+        menu.addAction(golden_action)
+
+        pos = self.toolbar.mapToGlobal(QPoint(240, self.toolbar.height()))
+        menu.popup(pos)
+
+    def grab_frame(self):
+        return self.browser.grab().toImage()
+
+    def save_screenshot(self):
+        path = os.path.join(get_capture_dir(self.profile_name), "screenshot.png")
+        self.grab_frame().save(path, "PNG")
+        self.statusBar().showMessage(f"Screenshot saved to {path}", 5000)
+
+    def start_capture(self, fps=30, video=False):
+        if self.frame_capture is not None:
+            return
+        self.frame_capture = FrameCapture(self.browser, get_capture_dir(self.profile_name), fps, video)
+        self.frame_capture.failed.connect(lambda error: self.stop_capture())
+        self.frame_capture.start()
+        self.statusBar().showMessage("Recording...")
+
+    def stop_capture(self):
+        if self.frame_capture is None:
+            return
+        capture = self.frame_capture
+        self.frame_capture = None
+        capture.stop()
+        if capture.encoder.error:
+            self.statusBar().showMessage(
+                f"Recording failed after {capture.index} frames: {capture.encoder.error}", 15000
+            )
+        else:
+            self.statusBar().showMessage(
+                f"Saved {capture.index} frames ({capture.dropped + capture.encoder.dropped} dropped) to {capture.output_dir}", 10000
+            )
+
+    def compare_with_golden(self, golden_path, threshold=GOLDEN_DIFF_THRESHOLD):
+        frame = self.grab_frame()
+        if not os.path.exists(golden_path):
+            frame.save(golden_path, "PNG")
+            return 0.0, True
+        score = perceptual_diff(frame, QImage(golden_path))
+        return score, score <= threshold
+
+    def compare_with_golden_dialog(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Golden Image", "", "PNG Images (*.png)", options=QFileDialog.Option.DontConfirmOverwrite
+        )
+        if not path:
+            return
+        existed = os.path.exists(path)
+        score, passed = self.compare_with_golden(path)
+        if not existed:
+            QMessageBox.information(self, "Golden Image", f"Golden image created at {path}")
+        else:
+            QMessageBox.information(
+                self, "Golden Image",
+                f"Difference: {score * 100:.2f}%\nResult: {'PASS' if passed else 'FAIL'}"
+            )
+
+    def closeEvent(self, event):
+        self.stop_capture()
+        if self.input_recorder is not None:
+            self.stop_input_recording()
+        if self.input_replayer is not None:
+            self.input_replayer.stop()
+        super().closeEvent(event)
+        self.closed.emit(self)
+
+    def open_network_menu(self):
+        menu = QMenu(self)
+
+        summary_action = QAction("Boot Summary", self)
+        summary_action.triggered.connect(lambda: self.collect_network_log(self.show_network_summary))
+        menu.addAction(summary_action)
+
+        export_action = QAction("Export HAR", self)
+        export_action.triggered.connect(lambda: self.collect_network_log(self.export_network_log))
+        menu.addAction(export_action)
+
+        summary_action.setEnabled(self.interceptor is not None)
+        export_action.setEnabled(self.interceptor is not None)
+
+        pos = self.toolbar.mapToGlobal(QPoint(320, self.toolbar.height()))
+        menu.popup(pos)
+
+    def collect_network_log(self, callback):
+        records = self.interceptor.boot_records()
+        boot_started = self.interceptor.boot_started
+
+        def merge(result):
+            timings = {}
+            try:
+                for entry in json.loads(result or "[]"):
+                    timings.setdefault(entry[0], []).append(entry[1:])
+            except ValueError:
+                pass
+
+            entries = []
+            for _, started, url, resource_type, method, blocked in records:
+                timing = timings.get(url, [])
+                start_time, duration, transfer_size, encoded_size, decoded_size = timing.pop(0) if timing else (None, None, None, None, None)
+                if blocked or not decoded_size:
+                    cache = None
+                else:
+                    cache = transfer_size == 0
+                entries.append({
+                    "startedDateTime": datetime.fromtimestamp(started).isoformat(),
+                    "time": duration,
+                    "request": {"method": method, "url": url},
+                    "response": {"bodySize": encoded_size, "_transferSize": transfer_size, "_decodedSize": decoded_size},
+                    "_resourceType": resource_type,
+                    "_blocked": blocked,
+                    "_cache": cache,
+                })
+
+            known = [e for e in entries if e["_cache"] is not None]
+            summary = {
+                "storage": self.profile_name,
+                "url": self.home_url,
+                "requests": len(entries),
+                "blocked": sum(1 for e in entries if e["_blocked"]),
+                "transferred_bytes": sum(e["response"]["_transferSize"] or 0 for e in entries),
+                "cache_hits": sum(1 for e in known if e["_cache"]),
+                "cache_hit_ratio": round(sum(1 for e in known if e["_cache"]) / len(known), 3) if known else None,
+            }
+            callback({
+                "log": {
+                    "version": "1.2",
+                    "creator": {"name": "Windows 96Box", "version": "1.0"},
+                    "pages": [{
+                        "startedDateTime": datetime.fromtimestamp(boot_started).isoformat(),
+                        "id": "boot",
+                        "title": self.windowTitle(),
+                    }],
+                    "entries": entries,
+                },
+                "_summary": summary,
+            })
+
+        self.browser.page().runJavaScript(RESOURCE_ENTRIES_JS, merge)
+
+    def show_network_summary(self, har):
+        summary = har["_summary"]
+        ratio = summary["cache_hit_ratio"]
+        QMessageBox.information(
+            self, "Network",
+            f"Requests: {summary['requests']}\n"
+            f"Blocked: {summary['blocked']}\n"
+            f"Transferred: {round(summary['transferred_bytes'] / (1024 * 1024), 2)} MB\n"
+            f"Cache hit ratio: {'unknown' if ratio is None else f'{ratio * 100:.1f}%'}"
+        )
+
+    def export_network_log(self, har):
+        path = os.path.join(get_network_dir(), f"{self.profile_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.har")
+        with open(path, "w") as f:
+            json.dump(har, f, indent=2)
+        self.statusBar().showMessage(f"Network log saved to {path}", 10000)
+
+    def open_input_menu(self):
+        menu = QMenu(self)
+
+        if self.input_recorder is None:
+            record_action = QAction("Start Recording", self)
+            record_action.setEnabled(self.input_replayer is None)
+            record_action.triggered.connect(self.start_input_recording)
+        else:
+            record_action = QAction("Stop Recording", self)
+            record_action.triggered.connect(self.stop_input_recording)
+        menu.addAction(record_action)
+
+        if self.input_replayer is None:
+            for label, realtime in (("Replay at Original Speed...", True), ("Replay as Fast as Possible...", False)):
+                action = QAction(label, self)
+                action.setEnabled(self.input_recorder is None)
+                action.triggered.connect(lambda checked=False, rt=realtime: self.replay_input_dialog(rt))
+                menu.addAction(action)
+        else:
+            stop_action = QAction("Stop Replay", self)
+            stop_action.triggered.connect(self.input_replayer.stop)
+            menu.addAction(stop_action)
+
+        pos = self.toolbar.mapToGlobal(QPoint(400, self.toolbar.height()))
+        menu.popup(pos)
+
+    def start_input_recording(self):
+        path = os.path.join(
+            get_benchmark_dir("Recordings"), f"{self.profile_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+        )
+        self.input_recorder = InputRecorder(self, path)
+        self.input_recorder.start()
+        self.statusBar().showMessage("Recording input...")
+
+    def stop_input_recording(self):
+        recorder = self.input_recorder
+        self.input_recorder = None
+        recorder.stop()
+        self.statusBar().showMessage(f"Recorded {recorder.count} events to {recorder.path}", 10000)
+
+    def replay_input_dialog(self, realtime):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Replay Input", get_benchmark_dir("Recordings"), "Input Recordings (*.jsonl)"
+        )
+        if path:
+            self.replay_input(path, realtime)
+
+    def replay_input(self, path, realtime=True):
+        try:
+            self.input_replayer = InputReplayer(self, path, realtime)
+        except (OSError, ValueError, IndexError) as e:
+            QMessageBox.warning(self, "Replay Input", f"Failed to load recording: {e}")
+            return
+        self.input_replayer.finished.connect(self.on_replay_finished)
+        self.statusBar().showMessage("Replaying input...")
+        self.input_replayer.start()
+
+    def on_replay_finished(self, report):
+        self.input_replayer = None
+        path = os.path.join(
+            get_benchmark_dir("Benchmarks"), f"{self.profile_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        )
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        latency = report["latency"]
+        self.statusBar().showMessage(
+            f"Replay done: {latency['count']} steps, p50 {latency['p50_ms']} ms, p99 {latency['p99_ms']} ms. Saved to {path}",
+            15000
+        )
+
     def toggle_fullscreen(self):
         if self.isFullScreen():
             self.showNormal()
@@ -511,7 +2383,7 @@ class BrowserWindow(QMainWindow):
 
     def open_dev_console(self):
         if not hasattr(self, "dev_console") or self.dev_console is None:
-            self.dev_console = DevConsole(self.browser.page())
+            self.dev_console = DevConsole(self.browser.page(), self.guest_monitor.console_bridge)
         self.dev_console.show()
         self.dev_console.raise_()
         self.dev_console.activateWindow()
@@ -523,6 +2395,251 @@ class BrowserWindow(QMainWindow):
             print(f"Error executing JS: {e}")
 
 
+class ConsolePage(QWebEnginePage):
+    consoleMessage = pyqtSignal(str, str, int, str)
+    dialogActive = pyqtSignal(bool)
+
+    def javaScriptConsoleMessage(self, level, message, line, source):
+        self.consoleMessage.emit(level.name.replace("MessageLevel", "").lower(), message, line, source)
+        super().javaScriptConsoleMessage(level, message, line, source)
+
+    def javaScriptAlert(self, securityOrigin, msg):
+        self.dialogActive.emit(True)
+        super().javaScriptAlert(securityOrigin, msg)
+        self.dialogActive.emit(False)
+
+    def javaScriptConfirm(self, securityOrigin, msg):
+        self.dialogActive.emit(True)
+        accepted = super().javaScriptConfirm(securityOrigin, msg)
+        self.dialogActive.emit(False)
+        return accepted
+
+    def javaScriptPrompt(self, securityOrigin, msg, defaultValue):
+        self.dialogActive.emit(True)
+        result = super().javaScriptPrompt(securityOrigin, msg, defaultValue)
+        self.dialogActive.emit(False)
+        return result
+
+
+class ControlError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class ControlConnection(QObject):
+    def __init__(self, socket, server):
+        super().__init__(server)
+        self.socket = socket
+        self.server = server
+        self.buffer = b""
+        self.closed = False
+        self.subscriptions = {}
+        self.next_subscription = 1
+        self.socket.readyRead.connect(self.read_requests)
+        self.socket.disconnected.connect(self.close)
+
+    def read_requests(self):
+        self.buffer += bytes(self.socket.readAll())
+        *lines, self.buffer = self.buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                self.handle(line)
+
+    def handle(self, line):
+        try:
+            request = json.loads(line)
+        except ValueError:
+            self.send({"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}})
+            return
+
+        request_id = request.get("id") if isinstance(request, dict) else None
+
+        def respond(result=None, error=None):
+            if request_id is None:
+                return
+            if error is not None:
+                self.send({"jsonrpc": "2.0", "id": request_id, "error": {"code": error.code, "message": error.message}})
+            else:
+                self.send({"jsonrpc": "2.0", "id": request_id, "result": result})
+
+        try:
+            if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+                raise ControlError(-32600, "Invalid request")
+            handler = self.server.methods.get(request["method"])
+            if handler is None:
+                raise ControlError(-32601, f"Method not found: {request['method']}")
+            params = request.get("params") or {}
+            if not isinstance(params, dict):
+                raise ControlError(-32602, "Params must be an object")
+            handler(self, params, respond)
+        except ControlError as e:
+            respond(error=e)
+        except Exception as e:
+            respond(error=ControlError(-32000, str(e)))
+
+    def send(self, message):
+        if not self.closed and self.socket.state() == QLocalSocket.LocalSocketState.ConnectedState:
+            self.socket.write(json.dumps(message).encode() + b"\n")
+
+    def notify(self, stream, window_id, params):
+        for subscription, (sub_stream, sub_window) in self.subscriptions.items():
+            if sub_stream == stream and sub_window in (None, window_id):
+                self.send({"jsonrpc": "2.0", "method": stream, "params": dict(params, subscription=subscription)})
+
+    def close(self):
+        self.closed = True
+        if self in self.server.connections:
+            self.server.connections.remove(self)
+        self.socket.deleteLater()
+        self.deleteLater()
+
+
+class ControlServer(QObject):
+    def __init__(self, launcher, name=CONTROL_SERVER_NAME):
+        super().__init__(launcher)
+        self.launcher = launcher
+        self.connections = []
+        self.methods = {
+            "list_storages": self.list_storages,
+            "list_windows": self.list_windows,
+            "launch": self.launch,
+            "close": self.close_window,
+            "eval": self.eval_js,
+            "exec_cmd": self.exec_cmd,
+            "fs.rename": self.fs_rename,
+            "fs.rm": self.fs_rm,
+            "fs.rmdir": self.fs_rmdir,
+            "bsod": self.bsod,
+            "subscribe": self.subscribe,
+            "unsubscribe": self.unsubscribe,
+        }
+
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self.server.newConnection.connect(self.accept_connections)
+        QLocalServer.removeServer(name)
+        if not self.server.listen(name):
+            launcher.statusBar().showMessage(f"Control server failed to listen on {name}: {self.server.errorString()}")
+
+        launcher.quota_monitor.sampled.connect(
+            lambda storage, size_mb: self.publish("metrics", None, {"storage": storage, "size_mb": size_mb})
+        )
+
+    def accept_connections(self):
+        while self.server.hasPendingConnections():
+            self.connections.append(ControlConnection(self.server.nextPendingConnection(), self))
+
+    def attach_window(self, window):
+        window.console_message.connect(
+            lambda level, message, line, source: self.publish("console", window.window_id, {
+                "window": window.window_id, "level": level, "message": message, "line": line, "source": source,
+            })
+        )
+
+    def publish(self, stream, window_id, params):
+        for connection in list(self.connections):
+            connection.notify(stream, window_id, params)
+
+    def get_window(self, params):
+        for window in self.launcher.open_windows:
+            if window.window_id == params.get("id") and window.isVisible():
+                return window
+        raise ControlError(-32602, f"No open window with id {params.get('id')}")
+
+    def run_js(self, params, js, respond):
+        window = self.get_window(params)
+        done = []
+
+        def finish(result=None, error=None):
+            if not done:
+                done.append(True)
+                respond(result, error)
+
+        window.browser.page().runJavaScript(js, lambda result: finish(result))
+        QTimer.singleShot(CONTROL_JS_TIMEOUT_MS, lambda: finish(error=ControlError(-32002, "Timed out waiting for the JavaScript result")))
+
+    def list_storages(self, connection, params, respond):
+        running = {w.profile_name for w in self.launcher.open_windows if w.isVisible()}
+        respond([
+            {
+                "name": name,
+                "version": data.get("version"),
+                "created": data.get("created"),
+                "last_launched": data.get("last_launched"),
+                "archived": is_storage_archived(name),
+                "running": name in running,
+            }
+            for name, data in self.launcher.storages.items()
+        ])
+
+    def list_windows(self, connection, params, respond):
+        respond([
+            {"id": w.window_id, "storage": w.profile_name, "title": w.windowTitle(), "url": w.browser.url().toString()}
+            for w in self.launcher.open_windows if w.isVisible()
+        ])
+
+    def launch(self, connection, params, respond):
+        name = params.get("storage")
+        if name not in self.launcher.storages:
+            raise ControlError(-32602, f"Unknown storage: {name}")
+        if is_storage_archived(name):
+            self.launcher.restore_storage(name, lambda error: self.finish_launch(name, error, respond))
+        else:
+            self.finish_launch(name, None, respond)
+
+    def finish_launch(self, name, error, respond):
+        if error is not None:
+            respond(error=ControlError(-32001, f"Failed to restore storage: {error}"))
+            return
+        try:
+            window = self.launcher.launch_storage(name, interactive=False)
+        except LaunchError as e:
+            respond(error=ControlError(-32001, str(e)))
+            return
+        if window is None:
+            respond(error=ControlError(-32000, "Failed to launch storage"))
+            return
+        respond({"id": window.window_id})
+
+    def close_window(self, connection, params, respond):
+        self.get_window(params).close()
+        respond(True)
+
+    def eval_js(self, connection, params, respond):
+        self.run_js(params, params.get("code", ""), respond)
+
+    def exec_cmd(self, connection, params, respond):
+        self.run_js(params, f"w96.sys.execCmd({json.dumps(params.get('command', ''))})", respond)
+
+    def fs_rename(self, connection, params, respond):
+        self.run_js(params, f"w96.FS.rename({json.dumps(params.get('path', ''))}, {json.dumps(params.get('name', ''))})", respond)
+
+    def fs_rm(self, connection, params, respond):
+        self.run_js(params, f"w96.FS.rm({json.dumps(params.get('path', ''))})", respond)
+
+    def fs_rmdir(self, connection, params, respond):
+        self.run_js(params, f"w96.FS.rmdir({json.dumps(params.get('path', ''))})", respond)
+
+    def bsod(self, connection, params, respond):
+        self.run_js(params, f"w96.sys.renderBSOD({json.dumps(params.get('message', ''))})", respond)
+
+    def subscribe(self, connection, params, respond):
+        stream = params.get("stream")
+        if stream not in ("console", "metrics"):
+            raise ControlError(-32602, f"Unknown stream: {stream}")
+        if params.get("id") is not None:
+            self.get_window(params)
+        subscription = connection.next_subscription
+        connection.next_subscription += 1
+        connection.subscriptions[subscription] = (stream, params.get("id"))
+        respond({"subscription": subscription})
+
+    def unsubscribe(self, connection, params, respond):
+        respond(connection.subscriptions.pop(params.get("subscription"), None) is not None)
+
+
 class CreateStorageDialog(QDialog):
     def __init__(self, versions):
         super().__init__()
@@ -600,8 +2717,31 @@ class WebLauncher(QMainWindow):
 
         self.storages = self.load_storages()
         self.open_windows = []
+        self.archive_worker = None
+        self.restores = {}
         self.init_ui()
 
+        self.quota_monitor = QuotaMonitor(self.storages, self)
+        self.quota_monitor.soft_limit_reached.connect(self.on_soft_limit)
+        self.quota_monitor.hard_limit_reached.connect(self.on_hard_limit)
+        self.quota_monitor.limit_cleared.connect(lambda window, size_mb: window.unfreeze())
+
+        self.next_window_id = 1
+        self.last_active_window = None
+        self.load_scheduler = LoadScheduler(load_settings().get("restore_concurrency", RESTORE_CONCURRENCY), self)
+        self.control_server = None
+        settings = load_settings()
+        if settings.get("control_server", False):
+            self.control_server = ControlServer(self, settings.get("control_server_name", CONTROL_SERVER_NAME))
+
+        self.archive_timer = QTimer(self)
+        self.archive_timer.timeout.connect(self.archive_idle_storages)
+        self.archive_timer.start(60 * 60 * 1000)
+        QTimer.singleShot(10 * 1000, self.archive_idle_storages)
+
+        if load_settings().get("restore_session", True):
+            QTimer.singleShot(0, self.restore_session)
+
     def toggle_toolbar(self, checked):
         self.toolbar.setVisible(checked)
 
@@ -609,15 +2749,8 @@ class WebLauncher(QMainWindow):
     def show_info(self, item):
         name = item.text()
         data = self.storages.get(name, {})
-        base_path = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
-        storage_path = os.path.join(base_path, f"Profile_{name}")
-
-        size_bytes = 0
-        for root, _, files in os.walk(storage_path):
-            for f in files:
-                fp = os.path.join(root, f)
-                size_bytes += os.path.getsize(fp)
-        size_mb = round(size_bytes / (1024 * 1024), 2)
+        archived = is_storage_archived(name)
+        size_mb = round(get_storage_size(name) / (1024 * 1024), 2)
 
         info_text = (
             f"Name: {name}\n"
@@ -626,6 +2759,11 @@ class WebLauncher(QMainWindow):
             f"Size: {size_mb} MB"
         )
 
+        if archived:
+            original_mb = round(data.get("original_size", 0) / (1024 * 1024), 2)
+            info_text += f" (archived, {original_mb} MB uncompressed)"
+            size_mb = original_mb
+
         limit_enabled = data.get("limit_enabled", False)
         info_text += f"\nLimit Enabled: {'Yes' if limit_enabled else 'No'}"
 
@@ -639,15 +2777,94 @@ class WebLauncher(QMainWindow):
 
 
 
+    def archive_idle_storages(self):
+        if self.archive_worker is not None and self.archive_worker.isRunning():
+            return
+
+        default_days = load_settings().get("archive_after_days", 30)
+        running = {w.profile_name for w in self.open_windows if w.isVisible() and w.booted}
+        now = datetime.now()
+
+        idle = []
+        for name, data in self.storages.items():
+            days = data.get("archive_after_days", default_days)
+            if not days or name in running or not os.path.isdir(get_profile_path(name)):
+                continue
+            last_used = data.get("last_launched") or data.get("created")
+            try:
+                last_used = datetime.strptime(last_used, "%Y-%m-%d %H:%M:%S")
+            except (TypeError, ValueError):
+                continue
+            if (now - last_used).days >= days:
+                idle.append(name)
+
+        if idle:
+            self.archive_worker = ArchiveWorker(idle)
+            self.archive_worker.archived.connect(self.on_storage_archived)
+            self.archive_worker.failed.connect(lambda name, error: self.statusBar().showMessage(f"Failed to archive {name}: {error}"))
+            self.archive_worker.start()
+
+    def on_storage_archived(self, name, original_size, archive_size):
+        if name in self.storages:
+            self.storages[name]["archived"] = True
+            self.storages[name]["original_size"] = original_size
+            self.save_storages()
+
+    def restore_storage(self, name, callback):
+        if name in self.restores:
+            self.restores[name].append(callback)
+            return
+        self.restores[name] = [callback]
+
+        dialog = QProgressDialog(f"Restoring \"{name}\" from archive...", None, 0, 100, self)
+        dialog.setWindowTitle("Restoring Storage")
+        dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        dialog.setMinimumDuration(0)
+        dialog.setValue(0)
+
+        errors = []
+        worker = RestoreWorker(name)
+        worker.progress.connect(lambda done, total: dialog.setValue(int(done * 100 / total)) if total else None)
+        worker.failed.connect(errors.append)
+        worker.finished.connect(lambda: self.on_storage_restored(name, worker, dialog, errors))
+        worker.start()
+
+    def on_storage_restored(self, name, worker, dialog, errors):
+        dialog.close()
+        worker.deleteLater()
+        for callback in self.restores.pop(name, []):
+            callback(errors[0] if errors else None)
+
+    def on_launch_restored(self, name, error):
+        if error is not None:
+            QMessageBox.warning(self, "Error", f"Failed to restore storage: {error}")
+            return
+        self.launch_storage(name)
+
+    def on_soft_limit(self, window, size_mb):
+        max_size = self.storages.get(window.profile_name, {}).get("max_size_mb", 0)
+        window.unfreeze()
+        window.statusBar().showMessage(f"Warning: storage uses {size_mb} MB of its {max_size} MB limit.")
+
+    def on_hard_limit(self, window, size_mb):
+        if self.storages.get(window.profile_name, {}).get("quota_action", "error") == "freeze":
+            window.freeze_for_quota(size_mb)
+        else:
+            self.quota_monitor.unwatch(window)
+            window.show_disk_error()
+
     def create_profile(self, name):
-        base_path = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
-        storage_path = os.path.join(base_path, f"Profile_{name}")
+        storage_path = get_profile_path(name)
         os.makedirs(storage_path, exist_ok=True)
 
         profile = QWebEngineProfile(f"Windows96Profile_{name}", self)
         profile.setPersistentStoragePath(storage_path)
         profile.setCachePath(storage_path)
         profile.setPersistentCookiesPolicy(QWebEngineProfile.PersistentCookiesPolicy.ForcePersistentCookies)
+
+        block_domains = load_settings().get("block_domains", []) + self.storages.get(name, {}).get("block_domains", [])
+        profile.interceptor = RequestInterceptor(block_domains, profile)
+        profile.setUrlRequestInterceptor(profile.interceptor)
         return profile
 
     def load_storages(self):
@@ -725,15 +2942,44 @@ class WebLauncher(QMainWindow):
             delete_action = menu.addAction("Delete")
             rename_action = menu.addAction("Rename")
             info_action = menu.addAction("Info")
+            maintenance_action = menu.addAction("Maintenance")
+            block_action = menu.addAction("Block List")
             action = menu.exec(self.list_widget.mapToGlobal(position))
             if action == info_action:
                 self.show_info(item)
+            elif action == maintenance_action:
+                self.open_maintenance(item.data(Qt.ItemDataRole.UserRole))
+            elif action == block_action:
+                self.edit_block_list(item.data(Qt.ItemDataRole.UserRole))
             elif action == rename_action:
                 self.rename_storage(item)
             elif action == delete_action:
                 self.delete_storage(item)
 
 
+    def edit_block_list(self, name):
+        current = "\n".join(self.storages[name].get("block_domains", []))
+        text, ok = QInputDialog.getMultiLineText(
+            self, "Block List", "Domains to block for this storage (one per line).\n"
+            "Applies on next launch, in addition to the global list in settings.json:", current
+        )
+        if ok:
+            self.storages[name]["block_domains"] = [d.strip() for d in text.splitlines() if d.strip()]
+            self.save_storages()
+
+    def open_maintenance(self, name):
+        if is_storage_archived(name):
+            QMessageBox.information(self, "Storage Maintenance", "This storage is archived. Launch it once to restore it first.")
+            return
+
+        profile = None
+        for window in self.open_windows:
+            if window.isVisible() and window.profile_name == name:
+                profile = window.browser.page().profile()
+                break
+
+        MaintenanceDialog(name, profile, self).exec()
+
     def delete_storage(self, item):
         name = item.data(Qt.ItemDataRole.UserRole)
         if name in self.storages:
@@ -748,14 +2994,17 @@ class WebLauncher(QMainWindow):
                 self.save_storages()
                 self.list_widget.takeItem(self.list_widget.row(item))
 
-                base_path = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
-                storage_path = os.path.join(base_path, f"Profile_{name}")
-                if os.path.exists(storage_path):
-                    try:
-                        import shutil
+                if self.archive_worker is not None:
+                    self.archive_worker.skip(name)
+                storage_path = get_profile_path(name)
+                archive_path = get_archive_path(name)
+                try:
+                    if os.path.exists(storage_path):
                         shutil.rmtree(storage_path)
-                    except Exception as e:
-                        QMessageBox.warning(self, "Error", f"Failed to delete storage files: {e}")
+                    if os.path.exists(archive_path):
+                        os.remove(archive_path)
+                except Exception as e:
+                    QMessageBox.warning(self, "Error", f"Failed to delete storage files: {e}")
 
 
     def rename_storage(self, item):
@@ -768,90 +3017,222 @@ class WebLauncher(QMainWindow):
             item.setText(display)
             item.setData(Qt.ItemDataRole.UserRole, new_name)
 
+    def register_window(self, window):
+        window.window_id = self.next_window_id
+        self.next_window_id += 1
+        self.open_windows.append(window)
+        window.activated.connect(self.on_window_activated)
+        window.closed.connect(lambda w: QTimer.singleShot(0, self.save_session))
+        if self.control_server is not None:
+            self.control_server.attach_window(window)
+
+    def on_window_activated(self, window):
+        self.last_active_window = window
+
+    def save_session(self):
+        windows = [
+            dict(w.session_state(), focused=w is self.last_active_window)
+            for w in self.open_windows if w.isVisible() and w.home_url != "about:blank"
+        ]
+        with open(SESSION_FILE, "w") as f:
+            json.dump({"windows": windows}, f)
+
+    def restore_session(self):
+        if not os.path.exists(SESSION_FILE):
+            return
+        try:
+            with open(SESSION_FILE, "r") as f:
+                entries = json.load(f).get("windows", [])
+        except ValueError:
+            return
+
+        stagger = load_settings().get("restore_mode", "focus") == "stagger"
+        focused = None
+        skipped = []
+        for entry in entries:
+            if entry.get("storage") not in self.storages:
+                skipped.append(f"{entry.get('storage')} (storage no longer exists)")
+                continue
+            try:
+                window = self.launch_storage(entry["storage"], lazy=True, interactive=False)
+            except LaunchError as e:
+                skipped.append(f"{entry['storage']} ({e})")
+                continue
+            if window is None:
+                skipped.append(f"{entry['storage']} (unknown version)")
+                continue
+
+            if entry.get("render_scale", 1.0) != 1.0:
+                window.set_render_scale(entry["render_scale"])
+            if entry.get("resolution"):
+                window.set_resolution(*entry["resolution"])
+                if entry.get("geometry"):
+                    x, y = entry["geometry"][:2]
+                    window.setGeometry(x, y, window.width(), window.height())
+            elif entry.get("geometry"):
+                window.setGeometry(*entry["geometry"])
+            if entry.get("fullscreen"):
+                window.showFullScreen()
+
+            if not window.booted:
+                window.boot_requested.connect(lambda w: self.load_scheduler.request(w, priority=True))
+                if entry.get("focused"):
+                    focused = window
+                elif stagger:
+                    self.load_scheduler.request(window)
+
+        if focused is not None:
+            focused.raise_()
+            focused.activateWindow()
+            self.load_scheduler.request(focused, priority=True)
+        if skipped:
+            self.statusBar().showMessage("Session restore skipped: " + ", ".join(skipped))
+
+    def closeEvent(self, event):
+        self.save_session()
+        super().closeEvent(event)
+
     def launch_website(self):   
         selected = self.list_widget.currentItem()
         if selected:
-            name = selected.data(Qt.ItemDataRole.UserRole)
-            data = self.storages.get(name)
-            if data:
-                self.storages[name]["last_launched"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                self.save_storages()
+            self.launch_storage(selected.data(Qt.ItemDataRole.UserRole))
+
+    def launch_storage(self, name, lazy=False, interactive=True):
+        data = self.storages.get(name)
+        if not data:
+            return None
+
+        if lazy:
+            url = self.websites.get(data["version"])
+            if not url:
+                return None
+            browser_window = BrowserWindow(f"{data['version']} ({name})", url, None, lazy=True, storage_name=name)
+            browser_window.profile_requested.connect(self.boot_window)
+            browser_window.show()
+            self.register_window(browser_window)
+            return browser_window
+
+        if self.archive_worker is not None:
+            self.archive_worker.skip(name)
+        if is_storage_archived(name):
+            if not interactive:
+                raise LaunchError("Storage is archived and must be restored first")
+            self.restore_storage(name, lambda error: self.on_launch_restored(name, error))
+            return None
+
+        self.storages[name]["last_launched"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.storages[name].pop("archived", None)
+        self.save_storages()
+
+        size_mb = round(get_storage_size(name) / (1024 * 1024), 2)
 
-                base_path = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
-                storage_path = os.path.join(base_path, f"Profile_{name}")
-
-                size_bytes = 0
-                for root, _, files in os.walk(storage_path):
-                    for f in files:
-                        fp = os.path.join(root, f)
-                        size_bytes += os.path.getsize(fp)
-                size_mb = round(size_bytes / (1024 * 1024), 2)
-
-                limit_enabled = data.get("limit_enabled", False)
-                max_size = data.get("max_size_mb", 0)
-
-                profile = self.create_profile(name)
-
-                if limit_enabled and size_mb > max_size:
-                    html = """
-                    <html>
-                    <head><style>
-                        body {
-                            background-color: black;
-                            color: lime;
-                            font-family: "Lucida Console", monospace;
-                            padding: 40px;
-                            font-size: 16px;
-                        }
-                        .border {
-                            border: 2px solid lime;
-                            padding: 20px;
-                            max-width: 600px;
-                            margin: auto;
-                        }
-                        h1 {
-                            color: red;
-                            font-size: 20px;
+        limit_enabled = data.get("limit_enabled", False)
+        max_size = data.get("max_size_mb", 0)
+
+        if limit_enabled and size_mb > max_size and not interactive:
+            raise LaunchError(f"Storage uses {size_mb} MB and exceeds its {max_size} MB limit")
+
+        if limit_enabled and size_mb > max_size:
+            confirm = QMessageBox.question(
+                self,
+                "Storage Full",
+                f"This storage uses {size_mb} MB of its {max_size} MB limit.\n"
+                "Open maintenance to purge caches and compact databases?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if confirm == QMessageBox.StandardButton.Yes:
+                self.open_maintenance(name)
+                size_mb = round(get_storage_size(name) / (1024 * 1024), 2)
+
+        profile = self.create_profile(name)
+
+        if limit_enabled and size_mb > max_size:
+            html = """
+            <html>
+            <head><style>
+                body {
+                    background-color: black;
+                    color: lime;
+                    font-family: "Lucida Console", monospace;
+                    padding: 40px;
+                    font-size: 16px;
+                }
+                .border {
+                    border: 2px solid lime;
+                    padding: 20px;
+                    max-width: 600px;
+                    margin: auto;
+                }
+                h1 {
+                    color: red;
+                    font-size: 20px;
+                }
+            </style></head>
+            <body>
+                <div class="border">
+                    <h1>*** DISK ERROR ***</h1>
+                    <p>LOCAL STORAGE HAS EXCEEDED ITS MAXIMUM ALLOWED SIZE.</p>
+                    <p>Please free up space or increase the size limit.</p>
+                </div>
+                <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
+                <script>
+                    document.body.addEventListener("keydown", () => {
+                        if (typeof pyBridge !== "undefined") {
+                            pyBridge.closeWindow();
                         }
-                    </style></head>
-                    <body>
-                        <div class="border">
-                            <h1>*** DISK ERROR ***</h1>
-                            <p>LOCAL STORAGE HAS EXCEEDED ITS MAXIMUM ALLOWED SIZE.</p>
-                            <p>Please free up space or increase the size limit.</p>
-                        </div>
-                        <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
-                        <script>
-                            document.body.addEventListener("keydown", () => {
-                                if (typeof pyBridge !== "undefined") {
-                                    pyBridge.closeWindow();
-                                }
-                            });
-                        </script>
-                    </body>
-                    </html>
-                    """
-                    browser_window = BrowserWindow(f"Storage Full - {name}", "about:blank", profile)
-                    browser_window.browser.setHtml(html)
-                    bridge = CloseBridge(browser_window)
-                    channel = QWebChannel()
-                    channel.registerObject("pyBridge", bridge)
-                    browser_window.browser.page().setWebChannel(channel)
-
-                    browser_window.browser.page().runJavaScript("""
-                        new QWebChannel(qt.webChannelTransport, function(channel) {
-                            window.pyBridge = channel.objects.pyBridge;
-                        });
-                    """)
-                    browser_window.show()
-                    self.open_windows.append(browser_window)
-                    return
+                    });
+                </script>
+            </body>
+            </html>
+            """
+            browser_window = BrowserWindow(f"Storage Full - {name}", "about:blank", profile)
+            browser_window.guest_monitor.stop()
+            browser_window.browser.setHtml(html)
+            bridge = CloseBridge(browser_window)
+            channel = QWebChannel()
+            channel.registerObject("pyBridge", bridge)
+            browser_window.browser.page().setWebChannel(channel)
+
+            browser_window.browser.page().runJavaScript("""
+                new QWebChannel(qt.webChannelTransport, function(channel) {
+                    window.pyBridge = channel.objects.pyBridge;
+                });
+            """)
+            browser_window.show()
+            self.register_window(browser_window)
+            return browser_window
+
+        url = self.websites.get(data["version"])
+        if url:
+            browser_window = BrowserWindow(f"{data['version']} ({name})", url, profile)
+            browser_window.show()
+            self.register_window(browser_window)
+            self.quota_monitor.watch(browser_window)
+            return browser_window
+        return None
+
+    def boot_window(self, window):
+        name = window.profile_name
+        if self.archive_worker is not None:
+            self.archive_worker.skip(name)
+        if is_storage_archived(name):
+            self.restore_storage(name, lambda error: self.on_boot_restored(window, error))
+        else:
+            self.on_boot_restored(window, None)
 
-                url = self.websites.get(data["version"])
-                if url:
-                    browser_window = BrowserWindow(f"{data['version']} ({name})", url, profile)
-                    browser_window.show()
-                    self.open_windows.append(browser_window)
+    def on_boot_restored(self, window, error):
+        name = window.profile_name
+        if error is not None:
+            window.booted = False
+            window.statusBar().showMessage(f"Failed to restore storage: {error}")
+            return
+        if name in self.storages:
+            self.storages[name]["last_launched"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.storages[name].pop("archived", None)
+            self.save_storages()
+        window.attach_profile(self.create_profile(name))
+        window.go_home()
+        self.quota_monitor.watch(window)
 
 
 